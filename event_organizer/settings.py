@@ -62,12 +62,17 @@ SPECTACULAR_SETTINGS = {
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "events.middleware.PrecompressedStaticMiddleware",
+    # Before anything that reads the database (sessions, authentication)
+    "events.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Keep last: it times the view from its process_view hook.
+    "events.middleware.ProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "event_organizer.urls"
@@ -82,6 +87,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "events.context_processors.notification_streaming",
             ],
         },
     },
@@ -100,6 +106,66 @@ DATABASES = {
     }
 }
 
+# SQLite tuned for many concurrent writers (RSVP bursts). WAL lets readers
+# run alongside the single writer, busy_timeout makes writers queue for the
+# lock instead of failing, and BEGIN IMMEDIATE takes the write lock when a
+# transaction starts, so two transactions can't deadlock upgrading read
+# locks (an error busy_timeout cannot wait out). WAL is stored in the
+# database file and stays on if this is later disabled.
+SQLITE_CONCURRENCY = True
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "busy_timeout": 5000,  # ms
+    "synchronous": "NORMAL",  # durable at checkpoints; safe with WAL
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,  # KiB
+}
+if SQLITE_CONCURRENCY and DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["OPTIONS"] = {
+        "init_command": ";".join(f"PRAGMA {k}={v}" for k, v in SQLITE_PRAGMAS.items()),
+        "transaction_mode": "IMMEDIATE",
+    }
+
+# Read replicas (events.routers.ReplicaRouter): GET/HEAD/OPTIONS requests read
+# from a random healthy alias in DATABASE_REPLICAS; writes, and reads by a
+# client that wrote in the last DATABASE_REPLICA_PIN_SECONDS, use "default".
+# A replica that fails to connect is skipped for DATABASE_REPLICA_RETRY_SECONDS.
+# "replica" is a second SQLite file for trying this locally (copy db.sqlite3
+# to it, then list it in DATABASE_REPLICAS); tests mirror it onto "default".
+DATABASES["replica"] = {
+    **DATABASES["default"],
+    "NAME": BASE_DIR / "db-replica.sqlite3",
+    "TEST": {"MIRROR": "default"},
+}
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_PIN_SECONDS = 5
+DATABASE_REPLICA_RETRY_SECONDS = 30
+DATABASE_ROUTERS = ["events.routers.ReplicaRouter"]
+
+# Extra attempts (with doubling backoff from the delay, in seconds) for RSVP
+# writes that still hit "database is locked"; see events.locking.
+DATABASE_LOCK_RETRIES = 4
+DATABASE_LOCK_RETRY_DELAY = 0.05
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Holds the change versions behind ETags and cached listings. With several
+# worker processes, switch to a shared backend, e.g.
+# "django.core.cache.backends.filebased.FileBasedCache" with LOCATION set.
+# ETags are built from one version key per event and per user
+# (events.caching), so MAX_ENTRIES must cover events + users + cached
+# listings and feeds with room to spare: a culled version comes back as
+# "changed now" and turns every 304 that depends on it into a full response.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "campusbites",
+        "OPTIONS": {"MAX_ENTRIES": 200000},
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,6 +203,25 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
+# collectstatic output, served by events.middleware.PrecompressedStaticMiddleware
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    # Outside DEBUG, collectstatic writes content-hashed names plus .gz/.br
+    # variants; {% static %} then links to the hashed names.
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "events.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
+# User uploads (profile pictures); served by Django itself only while DEBUG
+MEDIA_URL = "media/"
+MEDIA_ROOT = BASE_DIR / "media"
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -149,5 +234,40 @@ AUTH_TOKEN_COOKIE_NAME = "auth_token"
 AUTH_TOKEN_COOKIE_SECURE = not DEBUG
 AUTH_TOKEN_COOKIE_HTTPONLY = True
 AUTH_TOKEN_COOKIE_SAMESITE = "Lax"
+# In-process cache of authenticated tokens (user + profile preloaded)
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60  # seconds; bounds staleness across worker processes
 
 LOGIN_URL = "web-login"
+
+# Full-text search backend for the events `q` filter (dotted path).
+# None picks SQLite FTS5 on SQLite and plain icontains matching elsewhere.
+EVENTS_SEARCH_BACKEND = None
+
+# Seconds a shared events listing may stay cached; entries are versioned and
+# replaced as soon as an event changes. RSVP counters are read per request.
+EVENTS_LISTING_CACHE_TIMEOUT = 300
+
+# Local broker relaying notification pushes between worker processes
+# ("unix:/path/to.sock" or "host:port"; run it with run_push_broker). None keeps
+# pushes in-process, which only reaches streams served by the same process.
+PUSH_BROKER_ADDRESS = None
+
+# Uploaded profile pictures are re-encoded without metadata into the sizes in
+# events.images.AVATAR_SIZES (WebP + JPEG). "process" runs that in a pool of
+# AVATAR_WORKERS spawned processes after the upload commits; "inline" runs it
+# synchronously (tests, management scripts).
+AVATAR_PROCESSING = "process"
+AVATAR_WORKERS = 2
+
+# Per-request profiling (events.middleware.ProfilingMiddleware): Server-Timing
+# headers and one "events.profiling" log line per request. When disabled the
+# middleware drops out of the stack entirely.
+REQUEST_PROFILING = False
+# Share of requests (0-1) that also get a cProfile dump in REQUEST_PROFILING_DIR
+REQUEST_PROFILING_SAMPLE_RATE = 0.0
+# Sending this header with REQUEST_PROFILING_SECRET as its value (any value
+# while DEBUG) forces a dump for that request.
+REQUEST_PROFILING_HEADER = "X-Profile"
+REQUEST_PROFILING_SECRET = ""
+REQUEST_PROFILING_DIR = BASE_DIR / "profiles"
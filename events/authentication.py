@@ -1,7 +1,87 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
 from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
 from rest_framework.authentication import TokenAuthentication
 
 
+class TokenCache:
+    """In-process LRU of token key -> token with its user and profile loaded.
+
+    Entries expire after ``ttl`` seconds, which also bounds how long another
+    worker process can serve a stale entry. Within a process, logout and
+    user/profile saves invalidate entries explicitly (see ``events.signals``).
+    """
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            token = entry[1]
+        return self._clone(token)
+
+    def set(self, key, token):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, self._clone(token))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            stale = [k for k, (_, t) in self._entries.items() if t.user_id == user_id]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    @staticmethod
+    def _clone(token):
+        # Requests get private copies so nothing they mutate leaks into the cache.
+        user = copy.copy(token.user)
+        profile = user._state.fields_cache.get("profile")
+        if profile is not None:
+            user.profile = copy.copy(profile)
+        token = copy.copy(token)
+        token.user = user
+        return token
+
+
+token_cache = TokenCache(
+    maxsize=getattr(settings, "AUTH_TOKEN_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "AUTH_TOKEN_CACHE_TTL", 60),
+)
+
+
 class CookieTokenAuthentication(TokenAuthentication):
     """Token authentication that also looks for the token in a cookie."""
 
@@ -17,3 +97,19 @@ class CookieTokenAuthentication(TokenAuthentication):
             return None
 
         return self.authenticate_credentials(token)
+
+    def authenticate_credentials(self, key):
+        token = token_cache.get(key)
+        if token is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related("user__profile").get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_("Invalid token."))
+            if token.user.is_active:
+                token_cache.set(key, token)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_("User inactive or deleted."))
+
+        return (token.user, token)
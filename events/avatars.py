@@ -0,0 +1,110 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+
+from .authentication import token_cache
+from .images import FORMATS, process_avatar
+from .models import Profile
+
+logger = logging.getLogger(__name__)
+
+AVATAR_DIR = "avatars"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The shared worker pool, created on first use.
+
+    Workers are spawned rather than forked: forking a threaded server
+    process can deadlock, and the workers only need Pillow.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=getattr(settings, "AVATAR_WORKERS", 2),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def store(data, ext):
+    """Save ``data`` under a name derived from its SHA-256; identical files are stored once."""
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"{AVATAR_DIR}/{digest[:2]}/{digest}.{ext}"
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    return name
+
+
+def save_renditions(profile_id, source_name, renditions):
+    """Store renditions and point the profile at them.
+
+    Only applies if the profile still has the picture they were made from, so
+    a slow job cannot overwrite a newer upload. The queryset update skips the
+    Profile signals, so this process's token cache is cleared here; other
+    processes may show the deleted upload until their entries expire
+    (``AUTH_TOKEN_CACHE_TTL``), which beats keeping its metadata around.
+    """
+    original = store(renditions.pop("original"), "jpg")
+    variants = {
+        str(size): {fmt: store(data, fmt) for fmt, data in encoded.items()}
+        for size, encoded in renditions.items()
+    }
+    updated = Profile.objects.filter(pk=profile_id, profile_picture=source_name).update(
+        profile_picture=original, profile_picture_variants=variants
+    )
+    if updated:
+        user_id = Profile.objects.filter(pk=profile_id).values_list("user_id", flat=True).first()
+        token_cache.invalidate_user(user_id)
+        if source_name != original:
+            # The raw upload may still carry EXIF/GPS metadata.
+            default_storage.delete(source_name)
+    return updated
+
+
+def _finish(profile_id, source_name, future):
+    try:
+        save_renditions(profile_id, source_name, future.result())
+    except Exception:
+        logger.exception("Avatar processing failed for profile %s", profile_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_processing(profile):
+    """Process the profile's current picture once the surrounding transaction commits.
+
+    ``AVATAR_PROCESSING = "inline"`` runs the job synchronously, e.g. in tests.
+    """
+    source_name = profile.profile_picture.name
+    if not source_name or source_name.startswith(f"{AVATAR_DIR}/"):
+        return
+
+    def run():
+        with default_storage.open(source_name, "rb") as upload:
+            data = upload.read()
+        if getattr(settings, "AVATAR_PROCESSING", "process") == "inline":
+            save_renditions(profile.pk, source_name, process_avatar(data))
+            return
+        future = get_pool().submit(process_avatar, data)
+        future.add_done_callback(lambda f: _finish(profile.pk, source_name, f))
+
+    transaction.on_commit(run)
+
+
+def variant_urls(profile):
+    """``{size: {format: url}}`` for the profile's processed avatar, or ``{}``."""
+    return {
+        size: {fmt: default_storage.url(name) for fmt, name in formats.items() if fmt in FORMATS}
+        for size, formats in (profile.profile_picture_variants or {}).items()
+    }
@@ -0,0 +1,167 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+VERSION_KEY = "events:version:{}"
+# Version scope bumped from events.signals; RSVPs are versioned per user
+# and per event (below).
+LISTING_SCOPE = "listing"  # an event was created, changed or deleted
+
+LISTING_KEY = "events:listing:{}"
+
+
+def user_rsvps_scope(user_id):
+    """Version scope for one user's RSVPs (their personal calendar feed)."""
+    return f"rsvps:user:{user_id}"
+
+
+def event_rsvps_scope(event_id):
+    """Version scope for one event's RSVPs (its counters and attendees' ``my_rsvp``)."""
+    return f"rsvps:event:{event_id}"
+
+
+def get_version(scope):
+    """Timestamp of the last change in ``scope``.
+
+    Versions are wall-clock timestamps rather than counters so they double
+    as Last-Modified values, and a version lost to cache eviction or a
+    restart comes back as "changed just now" instead of reusing an old value.
+    """
+    key = VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), None)
+        version = cache.get(key, time.time())
+    return version
+
+
+def get_versions(scopes):
+    """``get_version`` for several scopes, in one cache round trip once they are set."""
+    keys = {VERSION_KEY.format(scope): scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    return [found[key] if key in found else get_version(scope) for key, scope in keys.items()]
+
+
+def bump_version(*scopes):
+    """Mark ``scopes`` as changed.
+
+    Inside a transaction the bump is repeated on commit, so a reader that
+    rebuilt a cached value from pre-commit data cannot keep it.
+    """
+
+    def bump():
+        for scope in scopes:
+            key = VERSION_KEY.format(scope)
+            cache.set(key, max(time.time(), (cache.get(key) or 0) + 1e-6), None)
+
+    bump()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump)
+
+
+def event_validators(request, event_ids=()):
+    """ETag and Last-Modified for serializing events to this user.
+
+    Built from versions alone, so a 304 costs no query: the events version,
+    the RSVP versions of ``event_ids`` (their counters and ``my_rsvp``) and
+    the user's own RSVP version (``rsvp`` filters), plus the user and path.
+    """
+    user = getattr(request, "user", None)
+    user_id = user.pk if user and user.is_authenticated else 0
+    scopes = [LISTING_SCOPE, *(event_rsvps_scope(pk) for pk in event_ids)]
+    if user_id:
+        scopes.append(user_rsvps_scope(user_id))
+    versions = get_versions(scopes)
+    raw = "|".join(str(part) for part in [user_id, request.get_full_path(), *versions])
+    etag = '"%s"' % hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return etag, datetime.fromtimestamp(max(versions), tz=dt_timezone.utc)
+
+
+def not_modified_response(request, etag, last_modified, max_age=None):
+    """A 304 response if the client's validators still match, else None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp())
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified, max_age=max_age)
+    return response
+
+
+def set_validators(response, etag, last_modified, max_age=None):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Per-user payloads: only the browser may cache, and by default it must
+    # revalidate; max_age lets it reuse a response briefly without asking.
+    if max_age:
+        patch_cache_control(response, private=True, max_age=max_age)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ["Authorization", "Cookie"])
+    return response
+
+
+def listing_cache_key(request):
+    """Cache key for a shared listing: host plus sorted, non-empty query params."""
+    params = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = f"{request.get_host()}?{urlencode(params)}"
+    return LISTING_KEY.format(hashlib.md5(raw.encode("utf-8")).hexdigest())
+
+
+def get_or_compute(key, version, compute, timeout=None, lock_timeout=10, max_wait=2.0):
+    """Return ``(version, value)`` for ``key``, recomputing when out of date.
+
+    Only one caller recomputes at a time (``cache.add`` as a lock). While it
+    does, others get the previous value if there is one, or briefly wait for
+    the fresh one. The returned version is the one the value was built for,
+    so callers can derive validators for exactly what they serve.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "EVENTS_LISTING_CACHE_TIMEOUT", 300)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, lock_timeout):
+        try:
+            value = compute()
+            cache.set(key, (version, value), timeout)
+            return version, value
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        return entry  # stale-while-revalidate
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(0.02)
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            return entry
+    return version, compute()
+
+
+def listing_validators(request, key, version, event_ids=()):
+    """ETag/Last-Modified for a cached listing served at ``version``.
+
+    Counters and ``my_rsvp`` are overlaid per request, so the RSVP versions
+    of the listed events are folded in; no database query is needed.
+    """
+    user = getattr(request, "user", None)
+    user_id = user.pk if user and user.is_authenticated else 0
+    versions = [version, *get_versions(event_rsvps_scope(pk) for pk in event_ids)]
+    raw = "|".join(str(part) for part in [user_id, key, *versions])
+    etag = '"%s"' % hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return etag, datetime.fromtimestamp(max(versions), tz=dt_timezone.utc)
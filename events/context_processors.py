@@ -0,0 +1,6 @@
+from . import push
+
+
+def notification_streaming(request):
+    """Whether pages should open the live notification stream (see push.streaming_available)."""
+    return {"notification_streaming": push.streaming_available(request)}
@@ -0,0 +1,79 @@
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+
+from .models import Event, RSVP
+
+COUNTER_FIELDS = {
+    RSVP.GOING: "going_count",
+    RSVP.MAYBE: "maybe_count",
+    RSVP.NOT_GOING: "not_going_count",
+    RSVP.WAITLISTED: "waitlisted_count",
+}
+
+
+def adjust_rsvp_counts(event_id, old_status=None, new_status=None):
+    """Move one RSVP between the event's counters with a single UPDATE."""
+    if old_status == new_status:
+        return
+    changes = {}
+    if old_status in COUNTER_FIELDS:
+        field = COUNTER_FIELDS[old_status]
+        changes[field] = F(field) - 1
+    if new_status in COUNTER_FIELDS:
+        field = COUNTER_FIELDS[new_status]
+        changes[field] = F(field) + 1
+    if changes:
+        Event.objects.filter(pk=event_id).update(**changes)
+
+
+def apply_rsvp_count_deltas(deltas):
+    """Apply ``{event_id: {status: delta}}`` to many events in one UPDATE."""
+    per_field = {}
+    for event_id, changes in deltas.items():
+        for status, delta in changes.items():
+            if delta and status in COUNTER_FIELDS:
+                per_field.setdefault(COUNTER_FIELDS[status], []).append(
+                    When(pk=event_id, then=Value(delta))
+                )
+    if not per_field:
+        return
+    Event.objects.filter(pk__in=list(deltas)).update(
+        **{
+            field: F(field)
+            + Case(*whens, default=Value(0), output_field=IntegerField())
+            for field, whens in per_field.items()
+        }
+    )
+
+
+def reconcile_rsvp_counts(queryset=None, dry_run=False, batch_size=500):
+    """Recount RSVPs and fix events whose counters drifted.
+
+    Returns the ids of the events that were (or, with ``dry_run``, would be)
+    corrected.
+    """
+    queryset = Event.objects.all() if queryset is None else queryset
+    actual = {
+        f"actual_{field}": Count("rsvps", filter=Q(rsvps__status=status))
+        for status, field in COUNTER_FIELDS.items()
+    }
+    drifted = (
+        queryset.annotate(**actual)
+        .exclude(
+            **{field: F(f"actual_{field}") for field in COUNTER_FIELDS.values()}
+        )
+        .only("id", *COUNTER_FIELDS.values())
+    )
+    fixed = []
+    batch = []
+    for event in drifted.iterator(chunk_size=batch_size):
+        for field in COUNTER_FIELDS.values():
+            setattr(event, field, getattr(event, f"actual_{field}"))
+        fixed.append(event.pk)
+        batch.append(event)
+        if len(batch) >= batch_size:
+            if not dry_run:
+                Event.objects.bulk_update(batch, list(COUNTER_FIELDS.values()))
+            batch = []
+    if batch and not dry_run:
+        Event.objects.bulk_update(batch, list(COUNTER_FIELDS.values()))
+    return fixed
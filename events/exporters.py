@@ -0,0 +1,54 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import RSVP
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 2000
+ATTENDEE_FIELDS = [
+    "user_id",
+    "user__username",
+    "user__email",
+    "user__first_name",
+    "user__last_name",
+    "status",
+    "created_at",
+]
+ATTENDEE_HEADER = [
+    "user_id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "status",
+    "rsvp_at",
+]
+
+
+class Echo:
+    """File-like object whose write() hands back the line for streaming."""
+
+    def write(self, value):
+        return value
+
+
+def attendee_rows(event, status=None, chunk_size=CHUNK_SIZE):
+    """Projected attendee tuples, fetched ``chunk_size`` rows at a time."""
+    qs = RSVP.objects.filter(event=event)
+    if status:
+        qs = qs.filter(status=status)
+    return qs.order_by("id").values_list(*ATTENDEE_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ATTENDEE_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(ATTENDEE_HEADER, row)), cls=DjangoJSONEncoder) + "\n"
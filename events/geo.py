@@ -0,0 +1,55 @@
+from math import asin, cos, degrees, radians, sin, sqrt
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+# Length of one degree of latitude (and of longitude at the equator).
+KM_PER_DEGREE = EARTH_RADIUS_KM * radians(1)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    # great-circle distance between two points
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = (
+        sin(dlat / 2) ** 2
+        + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * asin(sqrt(a))
+
+
+def bounding_box_filter(lat, lon, radius_km):
+    """Return lookups for a lat/lon box that contains the search circle.
+
+    The box is a cheap range predicate on the indexed latitude/longitude
+    columns, so only rows near the point reach the exact distance check.
+    The longitude bound is dropped near the poles or across the antimeridian.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    lookups = {
+        "latitude__gte": max(lat - dlat, -90.0),
+        "latitude__lte": min(lat + dlat, 90.0),
+    }
+    if abs(lat) + dlat < 90.0:
+        # asin keeps the box exact for large radii; cos(lat) alone would undershoot
+        dlon = degrees(asin(min(1.0, sin(radians(dlat)) / cos(radians(lat)))))
+        if -180.0 <= lon - dlon and lon + dlon <= 180.0:
+            lookups["longitude__gte"] = lon - dlon
+            lookups["longitude__lte"] = lon + dlon
+    return lookups
+
+
+def distance_km_expression(lat, lon):
+    """Haversine distance from (lat, lon) to each row, computed in SQL."""
+
+    def const(value):
+        return Value(value, output_field=FloatField())
+
+    half_dlat = (Radians(F("latitude")) - const(radians(lat))) / const(2.0)
+    half_dlon = (Radians(F("longitude")) - const(radians(lon))) / const(2.0)
+    a = Power(Sin(half_dlat), const(2.0)) + const(cos(radians(lat))) * Cos(
+        Radians(F("latitude"))
+    ) * Power(Sin(half_dlon), const(2.0))
+    # Clamp for float rounding so ASIN never sees a value above 1.
+    return const(2.0 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), const(1.0)))
@@ -0,0 +1,155 @@
+import hashlib
+import secrets
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from .caching import get_version, user_rsvps_scope
+from .models import Event, Profile, RSVP
+
+PRODID = "-//CampusBites//Events//EN"
+UID_DOMAIN = "campusbites"
+VEVENT_KEY = "ics:vevent:{}:{}"
+FEED_KEY = "ics:feed:{}"
+TOKEN_KEY = "ics:token:{}"
+# Rendered events and feeds are rebuilt on change, so this only bounds memory
+ICS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def ensure_calendar_token(profile, rotate=False):
+    """Return the profile's feed token, creating (or replacing) it if asked."""
+    if profile.calendar_token and not rotate:
+        return profile.calendar_token
+    if profile.calendar_token:
+        cache.delete(TOKEN_KEY.format(profile.calendar_token))
+    profile.calendar_token = secrets.token_urlsafe(32)
+    profile.save(update_fields=["calendar_token"])
+    return profile.calendar_token
+
+
+def user_id_for_token(token):
+    """Map a feed token to its user id, or None; cached so polls skip the lookup."""
+    key = TOKEN_KEY.format(token)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = (
+            Profile.objects.filter(calendar_token=token)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is None:
+            return None
+        cache.set(key, user_id, ICS_CACHE_TIMEOUT)
+    return user_id
+
+
+def going_events(user_id):
+    return Event.objects.filter(rsvps__user_id=user_id, rsvps__status=RSVP.GOING)
+
+
+def feed_validator(user_id):
+    """ETag for the user's feed, from one aggregate plus their RSVP version.
+
+    Editing an event moves its ``updated_at`` past every other, so the max
+    catches edits; a deleted event drops out of the count, and other RSVP
+    changes bump the per-user version.
+    """
+    stats = going_events(user_id).order_by().aggregate(last=Max("updated_at"), n=Count("id"))
+    raw = f"{user_id}|{stats['n']}|{stats['last']}|{get_version(user_rsvps_scope(user_id))}"
+    return '"%s"' % hashlib.md5(raw.encode("utf-8")).hexdigest()
+
+
+def escape_text(value):
+    return (
+        (value or "")
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Fold a content line to 75 octets without splitting a UTF-8 character."""
+    parts = []
+    current, size = "", 0
+    for char in line:
+        width = len(char.encode("utf-8"))
+        if size + width > 75:
+            parts.append(current)
+            current, size = " ", 1
+        current += char
+        size += width
+    parts.append(current)
+    return "\r\n".join(parts)
+
+
+def format_dt(value):
+    return value.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_vevent(event):
+    location = ", ".join(p for p in (event.location_name, event.address) if p)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{event.pk}@{UID_DOMAIN}",
+        f"DTSTAMP:{format_dt(event.updated_at)}",
+        f"DTSTART:{format_dt(event.start_time)}",
+        f"DTEND:{format_dt(event.end_time)}",
+        f"SUMMARY:{escape_text(event.title)}",
+    ]
+    if event.description:
+        lines.append(f"DESCRIPTION:{escape_text(event.description)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if event.latitude is not None and event.longitude is not None:
+        lines.append(f"GEO:{event.latitude};{event.longitude}")
+    if event.map_link:
+        lines.append(f"URL:{event.map_link}")
+    lines.append("END:VEVENT")
+    return "\r\n".join(fold(line) for line in lines)
+
+
+def render_feed(user_id):
+    """The full VCALENDAR body; only events whose ``updated_at`` moved are re-rendered."""
+    events = list(going_events(user_id).order_by("start_time", "id"))
+    keys = {
+        event.pk: VEVENT_KEY.format(event.pk, event.updated_at.timestamp())
+        for event in events
+    }
+    cached = cache.get_many(list(keys.values()))
+    fresh = {}
+    blocks = []
+    for event in events:
+        key = keys[event.pk]
+        block = cached.get(key)
+        if block is None:
+            block = fresh[key] = render_vevent(event)
+        blocks.append(block)
+    if fresh:
+        cache.set_many(fresh, ICS_CACHE_TIMEOUT)
+    return "\r\n".join(
+        [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "X-WR-CALNAME:CampusBites",
+            *blocks,
+            "END:VCALENDAR",
+            "",
+        ]
+    )
+
+
+def get_feed(user_id, etag):
+    """The feed body for ``etag``, reusing the cached body while it still matches."""
+    key = FEED_KEY.format(user_id)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == etag:
+        return entry[1]
+    body = render_feed(user_id)
+    cache.set(key, (etag, body), ICS_CACHE_TIMEOUT)
+    return body
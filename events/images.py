@@ -0,0 +1,56 @@
+import io
+
+from PIL import Image, ImageOps
+
+# Pure Pillow and no Django imports: this module runs in spawned worker processes.
+
+AVATAR_SIZES = (256, 64, 32)  # largest first; each is resized from the previous
+# Longest side of the re-encoded original that replaces the upload
+ORIGINAL_MAX_SIZE = 1024
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def _flatten(image):
+    """RGB copy of ``image``, with any transparency composited onto white."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, fmt):
+    pil_format, options = FORMATS[fmt]
+    buffer = io.BytesIO()
+    # No exif/icc_profile arguments, so no metadata is written.
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def process_avatar(data):
+    """Decode ``data`` once and return the re-encoded avatar renditions.
+
+    Returns ``{"original": jpeg, 256: {"webp": ..., "jpg": ...}, 64: ..., 32: ...}``.
+    EXIF orientation is applied and all metadata (EXIF, GPS, ICC, comments)
+    is dropped. Sizes are square centre crops.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        image = _flatten(ImageOps.exif_transpose(source))
+
+    original = image.copy()
+    original.thumbnail((ORIGINAL_MAX_SIZE, ORIGINAL_MAX_SIZE), Image.Resampling.LANCZOS)
+    renditions = {"original": _encode(original, "jpg")}
+
+    square = ImageOps.fit(
+        image, (AVATAR_SIZES[0], AVATAR_SIZES[0]), Image.Resampling.LANCZOS
+    )
+    for size in AVATAR_SIZES:
+        if square.width != size:
+            square = square.resize((size, size), Image.Resampling.LANCZOS)
+        renditions[size] = {fmt: _encode(square, fmt) for fmt in FORMATS}
+    return renditions
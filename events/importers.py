@@ -0,0 +1,201 @@
+import codecs
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .caching import LISTING_SCOPE, bump_version
+from .models import Event
+from .search import get_search_backend
+
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 1000
+# Cap on reported row errors so a bad file cannot grow the report unbounded
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFileError(Exception):
+    """The upload can't be read as a whole (e.g. not UTF-8); nothing was imported."""
+
+
+class ImportInterrupted(Exception):
+    """The run failed after some chunks were committed; ``report`` covers those."""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+class EventImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Event
+        fields = [
+            "title",
+            "description",
+            "perks",
+            "start_time",
+            "end_time",
+            "location_name",
+            "address",
+            "latitude",
+            "longitude",
+            "map_link",
+        ]
+
+
+def guess_format(filename):
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+def iter_rows(stream, file_format):
+    """Yield ``(line_number, row)`` from a binary stream, one record at a time.
+
+    ``row`` is a dict of field values, or an error message for an
+    unparseable line. Nothing beyond the current record is held. Raises
+    ImportFileError if the file isn't UTF-8.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if file_format == "csv":
+            reader = csv.DictReader(text)
+            while True:
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    break
+                except csv.Error as exc:  # e.g. a NUL byte; the reader moves past the line
+                    yield reader.line_num, f"Unreadable CSV row: {exc}"
+                    continue
+                # Empty CSV cells mean "not provided", so model defaults apply
+                yield reader.line_num, {k: v for k, v in row.items() if k and v != ""}
+        else:
+            for line_number, line in enumerate(text, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as exc:
+                    yield line_number, f"Invalid JSON: {exc}"
+                    continue
+                if not isinstance(row, dict):
+                    yield line_number, "Each line must be a JSON object."
+                    continue
+                yield line_number, row
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f"The file must be UTF-8 encoded ({exc.reason}).") from exc
+    finally:
+        text.detach()  # leave the caller's stream open
+
+
+def check_encoding(stream, block_size=64 * 1024):
+    """Raise ImportFileError unless the rest of ``stream`` decodes as UTF-8.
+
+    Reads in blocks with an incremental decoder, then rewinds the stream.
+    """
+    start = stream.tell()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        while block := stream.read(block_size):
+            decoder.decode(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f"The file must be UTF-8 encoded ({exc.reason}).") from exc
+    finally:
+        stream.seek(start)
+
+
+class EventImporter:
+    """Stream rows into ``Event`` in chunks: validate, then ``bulk_create``.
+
+    ``bulk_create`` skips ``Event.save`` and its signals, so the map link,
+    search index and listing cache version are handled here instead. Rows
+    that fail validation are reported and skipped.
+
+    Each chunk commits on its own, so SQLite's write lock is only held for
+    one chunk at a time and RSVPs keep flowing during a large import. A
+    seekable file is checked to be UTF-8 before anything is written; a run
+    that still fails part way keeps its committed chunks and raises
+    ImportInterrupted with their report.
+    """
+
+    def __init__(self, organizer, dry_run=False, chunk_size=CHUNK_SIZE):
+        self.organizer = organizer
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.total = self.created = self.failed = 0
+        self.errors = []
+        # Last line of the most recently committed chunk
+        self.last_line = 0
+
+    def run(self, stream, file_format):
+        if stream.seekable():
+            check_encoding(stream)
+        chunk = []
+        try:
+            for line_number, row in iter_rows(stream, file_format):
+                chunk.append((line_number, row))
+                if len(chunk) >= self.chunk_size:
+                    self._commit_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._commit_chunk(chunk)
+        except Exception as exc:
+            if self.dry_run or not self.created:
+                raise
+            raise ImportInterrupted(
+                f"The import stopped after line {self.last_line}: {exc}. "
+                f"The {self.created} events before it were created.",
+                self.report(),
+            ) from exc
+        finally:
+            if self.created and not self.dry_run:
+                bump_version(LISTING_SCOPE)
+        return self.report()
+
+    def _commit_chunk(self, chunk):
+        with transaction.atomic():
+            created = self._import_chunk(chunk)
+        self.created += created
+        self.last_line = chunk[-1][0]
+
+    def report(self):
+        return {
+            "dry_run": self.dry_run,
+            "total": self.total,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+    def _error(self, line_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "errors": errors})
+
+    def _import_chunk(self, chunk):
+        validator = EventImportSerializer()
+        events = []
+        for line_number, row in chunk:
+            self.total += 1
+            if isinstance(row, str):
+                self._error(line_number, {"non_field_errors": [row]})
+                continue
+            try:
+                data = validator.run_validation(row)
+            except serializers.ValidationError as exc:
+                self._error(line_number, exc.detail)
+                continue
+            event = Event(created_by=self.organizer, **data)
+            if not event.map_link:
+                event.map_link = event.build_map_link()
+            events.append(event)
+
+        if not self.dry_run:
+            Event.objects.bulk_create(events)
+            get_search_backend().index(events)
+        return len(events)
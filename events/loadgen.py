@@ -0,0 +1,410 @@
+import io
+import json
+import multiprocessing
+import random
+import re
+import statistics
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .caching import LISTING_SCOPE, bump_version
+from .counters import reconcile_rsvp_counts
+from .models import Announcement, Event, Profile, RSVP
+from .search import get_search_backend
+
+SEED_BATCH = 2000
+SEED_PASSWORD = "campus-load"
+CAMPUS_CENTER = (40.7128, -74.0060)
+TITLES = [
+    "Pizza night", "Career fair", "Study group", "Open mic", "Hackathon",
+    "Robotics workshop", "Film screening", "Yoga on the lawn", "Chess club", "Bake sale",
+]
+PLACES = ["Student Union", "Library", "Engineering Hall", "Quad", "Gym", "Arts Center"]
+SEARCH_WORDS = ["pizza", "career", "study", "workshop", "film", "club", "hack"]
+# Upper bounds (ms) of the latency histogram buckets; the last is open-ended
+HISTOGRAM_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+
+# ---------- Seeding ----------
+def seed_prefix(seed):
+    """Username prefix of the users seeded with ``seed``."""
+    return f"campus{seed}_"
+
+
+def seed_campus(
+    users=500,
+    organizers=25,
+    events=2000,
+    rsvps_per_user=8,
+    announcements=200,
+    days=120,
+    seed=0,
+    password=SEED_PASSWORD,
+):
+    """Bulk-insert a campus-shaped dataset and return the created counts.
+
+    Rows are inserted without per-row signals, so counters, the search index
+    and cache versions are brought up to date at the end. Every seeded user
+    shares ``password`` (hashed once) and gets an auth token.
+    """
+    rng = random.Random(seed)
+    User = get_user_model()
+    now = timezone.now()
+    prefix = seed_prefix(seed)
+    hashed = make_password(password)
+
+    User.objects.bulk_create(
+        [
+            User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.edu", password=hashed)
+            for i in range(users)
+        ],
+        batch_size=SEED_BATCH,
+    )
+    people = list(User.objects.filter(username__startswith=prefix).order_by("id"))
+    Profile.objects.bulk_create(
+        [Profile(user=u, is_organizer=i < organizers) for i, u in enumerate(people)],
+        batch_size=SEED_BATCH,
+    )
+    Token.objects.bulk_create(
+        [Token(user=u, key=Token.generate_key()) for u in people], batch_size=SEED_BATCH
+    )
+    hosts = people[:organizers] or people[:1]
+
+    rows = []
+    for i in range(events):
+        start = now + timedelta(hours=rng.randint(-24 * days // 4, 24 * days))
+        start = start.replace(minute=rng.choice([0, 30]), second=0, microsecond=0)
+        rows.append(
+            Event(
+                created_by=rng.choice(hosts),
+                title=f"{rng.choice(TITLES)} #{i}",
+                description=f"Hosted at the {rng.choice(PLACES)}. Everyone welcome!",
+                perks=rng.choice(["free pizza", "free coffee", "swag", ""]),
+                start_time=start,
+                end_time=start + timedelta(minutes=rng.choice([60, 90, 120, 180])),
+                location_name=rng.choice(PLACES),
+                latitude=CAMPUS_CENTER[0] + rng.gauss(0, 0.01),
+                longitude=CAMPUS_CENTER[1] + rng.gauss(0, 0.01),
+            )
+        )
+    for event in rows:
+        event.map_link = event.build_map_link()
+    Event.objects.bulk_create(rows, batch_size=SEED_BATCH)
+    event_ids = list(
+        Event.objects.filter(created_by__in=hosts).order_by("id").values_list("id", flat=True)
+    )
+
+    statuses = [RSVP.GOING] * 3 + [RSVP.MAYBE, RSVP.NOT_GOING]
+    rsvps = []
+    for person in people:
+        for event_id in rng.sample(event_ids, min(rsvps_per_user, len(event_ids))):
+            rsvps.append(RSVP(user=person, event_id=event_id, status=rng.choice(statuses)))
+    RSVP.objects.bulk_create(rsvps, batch_size=SEED_BATCH, ignore_conflicts=True)
+
+    author_of = dict(
+        Event.objects.filter(id__in=event_ids).values_list("id", "created_by_id")
+    )
+    announced = rng.choices(event_ids, k=announcements) if event_ids else []
+    Announcement.objects.bulk_create(
+        [
+            Announcement(
+                event_id=event_id,
+                author_id=author_of[event_id],
+                title="Heads up",
+                body=rng.choice(["Room change.", "Starts 15 minutes late.", "Bring a friend!"]),
+            )
+            for event_id in announced
+        ],
+        batch_size=SEED_BATCH,
+    )
+
+    reconcile_rsvp_counts(batch_size=SEED_BATCH)
+    get_search_backend().rebuild(batch_size=SEED_BATCH)
+    bump_version(LISTING_SCOPE)
+    return {
+        "users": len(people),
+        "events": len(event_ids),
+        "rsvps": len(rsvps),
+        "announcements": len(announced),
+    }
+
+
+# ---------- Request sources ----------
+# (name, weight, method, path template, authenticated, body template)
+DEFAULT_MIX = [
+    ("events-list", 30, "GET", "/api/events/", False, None),
+    ("events-search", 8, "GET", "/api/events/?q={word}", False, None),
+    ("events-nearby", 8, "GET", "/api/events/?lat={lat}&lon={lon}&radius_km=2", False, None),
+    ("events-going", 10, "GET", "/api/events/?rsvp=going", True, None),
+    ("event-detail", 15, "GET", "/api/events/{event}/", False, None),
+    ("calendar", 5, "GET", "/api/events/calendar/?rsvp=going&start={start}&end={end}", True, None),
+    ("rsvp", 10, "POST", "/api/rsvps/", True, {"event": "{event}", "status": "{status}"}),
+    ("notifications-unread", 10, "GET", "/api/notifications/unread_count/", True, None),
+    ("profile-me", 4, "GET", "/api/profiles/me/", True, None),
+]
+
+# A popular event opening: everyone RSVPs to the same few events at once
+RSVP_BURST_MIX = [
+    ("rsvp", 9, "POST", "/api/rsvps/", True, {"event": "{hot_event}", "status": "going"}),
+    ("event-detail", 1, "GET", "/api/events/{hot_event}/", False, None),
+]
+MIXES = {"default": DEFAULT_MIX, "rsvp-burst": RSVP_BURST_MIX}
+HOT_EVENTS = 3
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method, path):
+    """Group requests by method and path with ids collapsed, e.g. ``GET /api/events/{id}/``."""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', urlsplit(path).path)}"
+
+
+def load_log(path):
+    """Read a JSONL request log.
+
+    One object per line: ``{"method": "GET", "path": "/api/events/?q=x",
+    "user": "alice", "body": {...}}``; only ``path`` is required and ``user``
+    (a username) makes the request authenticated.
+    """
+    requests = []
+    with open(path, encoding="utf-8") as stream:
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                requests.append(
+                    {
+                        "name": entry.get("name")
+                        or endpoint_name(entry.get("method", "GET").upper(), entry["path"]),
+                        "method": entry.get("method", "GET").upper(),
+                        "path": entry["path"],
+                        "user": entry.get("user"),
+                        "body": entry.get("body"),
+                    }
+                )
+            except (ValueError, KeyError, AttributeError) as exc:
+                raise ValueError(f"{path}:{line_number}: invalid request ({exc})") from exc
+    return requests
+
+
+def _fill(template, values):
+    if isinstance(template, dict):
+        return {key: _fill(value, values) for key, value in template.items()}
+    if isinstance(template, str):
+        filled = template.format(**values)
+        return int(filled) if filled.isdigit() and template != filled else filled
+    return template
+
+
+def synthetic_requests(count, mix=DEFAULT_MIX, seed=0):
+    """``count`` requests drawn from ``mix`` by weight, with ids from the database."""
+    rng = random.Random(seed)
+    event_ids = list(Event.objects.values_list("id", flat=True)[:10000])
+    usernames = list(
+        Token.objects.order_by("user_id").values_list("user__username", flat=True)[:1000]
+    )
+    if not event_ids or not usernames:
+        raise ValueError("No events or users with tokens to draw from; run seed_campus first.")
+    weights = [entry[1] for entry in mix]
+    hot_events = rng.sample(event_ids, min(HOT_EVENTS, len(event_ids)))
+    now = timezone.now()
+    requests = []
+    for name, _weight, method, path, authenticated, body in rng.choices(mix, weights, k=count):
+        start = now + timedelta(days=rng.randint(-30, 60))
+        values = {
+            "event": rng.choice(event_ids),
+            "hot_event": rng.choice(hot_events),
+            "word": rng.choice(SEARCH_WORDS),
+            "lat": round(CAMPUS_CENTER[0] + rng.gauss(0, 0.01), 5),
+            "lon": round(CAMPUS_CENTER[1] + rng.gauss(0, 0.01), 5),
+            "start": start.date().isoformat(),
+            "end": (start + timedelta(days=35)).date().isoformat(),
+            "status": rng.choice([RSVP.GOING, RSVP.MAYBE, RSVP.NOT_GOING]),
+        }
+        requests.append(
+            {
+                "name": name,
+                "method": method,
+                "path": _fill(path, values),
+                "user": rng.choice(usernames) if authenticated else None,
+                "body": _fill(body, values),
+            }
+        )
+    return requests
+
+
+# ---------- Running ----------
+def default_host():
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")]
+    return hosts[0] if hosts else "localhost"
+
+
+def _environ(request, host, token):
+    url = urlsplit(request["path"])
+    body = b""
+    if request.get("body") is not None:
+        body = json.dumps(request["body"]).encode("utf-8")
+    environ = {
+        "REQUEST_METHOD": request["method"],
+        "PATH_INFO": url.path,
+        "QUERY_STRING": url.query,
+        "SERVER_NAME": host,
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": host,
+        "HTTP_ACCEPT": "application/json",
+        "REMOTE_ADDR": "127.0.0.1",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": io.StringIO(),
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    if token:
+        environ["HTTP_AUTHORIZATION"] = f"Token {token}"
+    return environ
+
+
+def _call(application, environ):
+    status = []
+
+    def start_response(status_line, headers, exc_info=None):
+        status.append(int(status_line.split(" ", 1)[0]))
+
+    result = application(environ, start_response)
+    try:
+        for _chunk in result:
+            pass
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return status[0]
+
+
+def _send(application, request, host, tokens):
+    environ = _environ(request, host, tokens.get(request.get("user")))
+    started = time.perf_counter()
+    try:
+        status = _call(application, environ)
+    except Exception:
+        status = 0
+    return request["name"], status, (time.perf_counter() - started) * 1000
+
+
+def run_requests(requests, threads=1, host=None):
+    """Send ``requests`` through the WSGI app; returns ``[(name, status, ms)]``.
+
+    Status 0 means the request raised. Threads share one iterator, so
+    requests are taken in order as workers free up. With one thread the
+    requests run inline on the caller's database connection.
+    """
+    application = get_wsgi_application()
+    host = host or default_host()
+    tokens = dict(
+        Token.objects.filter(
+            user__username__in={r["user"] for r in requests if r.get("user")}
+        ).values_list("user__username", "key")
+    )
+    if threads <= 1:
+        return [_send(application, request, host, tokens) for request in requests]
+
+    results = []
+    lock = threading.Lock()
+    source = iter(requests)
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    request = next(source, None)
+                if request is None:
+                    return
+                row = _send(application, request, host, tokens)
+                with lock:
+                    results.append(row)
+        finally:
+            connections.close_all()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return results
+
+
+def _run_chunk(args):
+    requests, threads, host = args
+    return run_requests(requests, threads=threads, host=host)
+
+
+def run_load(requests, threads=1, processes=1, host=None):
+    """Run ``requests`` across ``processes`` x ``threads`` workers.
+
+    Returns ``(results, wall_seconds)``. Processes are forked, so each gets
+    its own DB connections; requests are dealt round-robin between them.
+    """
+    started = time.perf_counter()
+    if processes <= 1:
+        results = run_requests(requests, threads=threads, host=host)
+    else:
+        connections.close_all()  # don't share a connection across the fork
+        chunks = [(requests[i::processes], threads, host) for i in range(processes)]
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            results = [row for part in pool.map(_run_chunk, chunks) for row in part]
+    return results, time.perf_counter() - started
+
+
+# ---------- Reporting ----------
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(results, wall_seconds):
+    """Per-endpoint throughput, latency percentiles, histogram and error rate.
+
+    Status 5xx and requests that raised count as errors; 4xx are reported
+    separately since replayed logs legitimately contain them.
+    """
+    by_name = {}
+    for name, status, elapsed in results:
+        by_name.setdefault(name, []).append((status, elapsed))
+    report = {}
+    for name, rows in sorted(by_name.items()):
+        latencies = sorted(elapsed for _status, elapsed in rows)
+        errors = sum(1 for status, _ in rows if status == 0 or status >= 500)
+        client_errors = sum(1 for status, _ in rows if 400 <= status < 500)
+        histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        for elapsed in latencies:
+            index = next(
+                (i for i, bound in enumerate(HISTOGRAM_BUCKETS) if elapsed <= bound),
+                len(HISTOGRAM_BUCKETS),
+            )
+            histogram[index] += 1
+        report[name] = {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / wall_seconds, 2) if wall_seconds else 0.0,
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p95_ms": round(_percentile(latencies, 0.95), 2),
+            "p99_ms": round(_percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+            "error_rate": round(errors / len(rows), 4),
+            "client_error_rate": round(client_errors / len(rows), 4),
+            "histogram": histogram,
+        }
+    return report
@@ -0,0 +1,53 @@
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+logger = logging.getLogger(__name__)
+
+# sqlite3's messages for SQLITE_BUSY / SQLITE_LOCKED
+LOCK_ERROR_MESSAGES = ("database is locked", "database table is locked")
+
+
+def is_lock_error(exc):
+    return isinstance(exc, OperationalError) and any(
+        message in str(exc) for message in LOCK_ERROR_MESSAGES
+    )
+
+
+def retry_on_lock(func=None, *, using=None):
+    """Retry ``func`` with jittered exponential backoff while the database is locked.
+
+    Up to ``DATABASE_LOCK_RETRIES`` extra attempts, waiting
+    ``DATABASE_LOCK_RETRY_DELAY`` seconds doubled each time. Only retries
+    when called outside a transaction: inside one, the failed statement may
+    have left work half done, so the error goes to whoever owns the
+    transaction.
+    """
+    if func is None:
+        return functools.partial(retry_on_lock, using=using)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = getattr(settings, "DATABASE_LOCK_RETRIES", 4)
+        delay = getattr(settings, "DATABASE_LOCK_RETRY_DELAY", 0.05)
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except OperationalError as exc:
+                if (
+                    attempt >= retries
+                    or not is_lock_error(exc)
+                    or transaction.get_connection(using).in_atomic_block
+                ):
+                    raise
+            attempt += 1
+            wait = delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+            logger.info("Database locked in %s; retry %d in %.3fs", func.__qualname__, attempt, wait)
+            time.sleep(wait)
+
+    return wrapper
@@ -0,0 +1,57 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events.importers import (
+    CHUNK_SIZE,
+    FORMATS,
+    EventImporter,
+    ImportFileError,
+    ImportInterrupted,
+    guess_format,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream events from a CSV or NDJSON file into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import.")
+        parser.add_argument(
+            "--organizer", required=True, help="Username recorded as created_by."
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=FORMATS,
+            help="Defaults to ndjson for .ndjson/.jsonl files, csv otherwise.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate only; write nothing."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            organizer = get_user_model().objects.get(username=options["organizer"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['organizer']!r}.")
+
+        file_format = options["file_format"] or guess_format(options["path"])
+        importer = EventImporter(
+            organizer, dry_run=options["dry_run"], chunk_size=options["chunk_size"]
+        )
+        try:
+            with open(options["path"], "rb") as stream:
+                report = importer.run(stream, file_format)
+        except (OSError, ImportFileError, ImportInterrupted) as exc:
+            raise CommandError(str(exc))
+
+        for error in report["errors"]:
+            self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'])}")
+        verb = "Would create" if report["dry_run"] else "Created"
+        self.stdout.write(
+            f"{verb} {report['created']} of {report['total']} events "
+            f"({report['failed']} failed)."
+        )
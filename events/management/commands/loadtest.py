@@ -0,0 +1,84 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events import loadgen
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a JSONL request log, or a weighted synthetic mix, against the WSGI app "
+        "and report throughput, latency and error rates per endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log", help="JSONL request log to replay; omit for a synthetic mix."
+        )
+        parser.add_argument(
+            "--requests", type=int, default=1000, help="Synthetic requests to generate."
+        )
+        parser.add_argument(
+            "--mix",
+            choices=sorted(loadgen.MIXES),
+            default="default",
+            help="Synthetic scenario; rsvp-burst sends concurrent RSVPs to a few hot events.",
+        )
+        parser.add_argument("--threads", type=int, default=4, help="Threads per process.")
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--host", help="Host header; defaults to ALLOWED_HOSTS[0].")
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options["log"]:
+                requests = loadgen.load_log(options["log"])
+            else:
+                requests = loadgen.synthetic_requests(
+                    options["requests"], mix=loadgen.MIXES[options["mix"]], seed=options["seed"]
+                )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        if not requests:
+            raise CommandError("Nothing to send.")
+
+        # Failures are counted in the report; don't print a traceback for each.
+        request_logger = logging.getLogger("django.request")
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            results, wall = loadgen.run_load(
+                requests,
+                threads=options["threads"],
+                processes=options["processes"],
+                host=options["host"],
+            )
+        finally:
+            request_logger.setLevel(level)
+        report = loadgen.summarize(results, wall)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{len(results)} requests in {wall:.2f}s "
+            f"({len(results) / wall:.1f} req/s, {options['processes']}x{options['threads']} workers)"
+        )
+        header = f"{'endpoint':<40} {'n':>6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'4xx%':>6}"
+        self.stdout.write(header)
+        for name, row in report.items():
+            self.stdout.write(
+                f"{name:<40} {row['requests']:>6} {row['throughput_rps']:>8.1f} "
+                f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+                f"{row['error_rate'] * 100:>6.1f} {row['client_error_rate'] * 100:>6.1f}"
+            )
+        bounds = [f"<={b}ms" for b in loadgen.HISTOGRAM_BUCKETS] + [
+            f">{loadgen.HISTOGRAM_BUCKETS[-1]}ms"
+        ]
+        self.stdout.write("\nLatency histogram: " + " ".join(bounds))
+        for name, row in report.items():
+            self.stdout.write(f"{name:<40} " + " ".join(str(n) for n in row["histogram"]))
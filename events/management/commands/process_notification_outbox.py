@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued event notifications (run as a long-lived worker)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Drain due entries once and exit."
+        )
+        parser.add_argument("--limit", type=int, default=100, help="Entries per poll.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=outbox.BATCH_SIZE,
+            help="Notifications per bulk insert.",
+        )
+        parser.add_argument("--max-attempts", type=int, default=outbox.MAX_ATTEMPTS)
+        parser.add_argument(
+            "--poll-interval", type=float, default=2.0, help="Seconds to sleep when idle."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered, failed = outbox.process_outbox(
+                limit=options["limit"],
+                batch_size=options["batch_size"],
+                max_attempts=options["max_attempts"],
+            )
+            if delivered or failed:
+                self.stdout.write(f"Delivered {delivered} entries, {failed} failed.")
+            if options["once"]:
+                return
+            if not (delivered or failed):
+                time.sleep(options["poll_interval"])
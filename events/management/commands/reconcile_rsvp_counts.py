@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from events.counters import reconcile_rsvp_counts
+
+
+class Command(BaseCommand):
+    help = "Recount RSVPs and repair drifted going/maybe/not_going counters on events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Report drift without fixing it."
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        fixed = reconcile_rsvp_counts(
+            dry_run=options["dry_run"], batch_size=options["batch_size"]
+        )
+        verb = "Would fix" if options["dry_run"] else "Fixed"
+        self.stdout.write(f"{verb} {len(fixed)} event(s).")
+        if fixed and options["verbosity"] > 1:
+            self.stdout.write("Event ids: " + ", ".join(str(pk) for pk in fixed))
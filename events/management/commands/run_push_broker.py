@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from events import push
+
+
+class Command(BaseCommand):
+    help = "Relay notification pushes between worker processes (see PUSH_BROKER_ADDRESS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--address",
+            help='"unix:/path/to.sock" or "host:port"; defaults to PUSH_BROKER_ADDRESS.',
+        )
+
+    def handle(self, *args, **options):
+        address = options["address"] or push.broker_address()
+        if not address:
+            raise CommandError("Set PUSH_BROKER_ADDRESS or pass --address.")
+        self.stdout.write(f"Push broker listening on {address}")
+        try:
+            asyncio.run(push.serve_broker(address))
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events import loadgen
+
+
+class Command(BaseCommand):
+    help = "Seed a realistic campus dataset (users, organizers, events, RSVPs, announcements)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--organizers", type=int, default=25)
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--rsvps-per-user", type=int, default=8)
+        parser.add_argument("--announcements", type=int, default=200)
+        parser.add_argument(
+            "--days", type=int, default=120, help="How far ahead events are scheduled."
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; also namespaces usernames, so reseed with a new value.",
+        )
+        parser.add_argument(
+            "--password",
+            default=loadgen.SEED_PASSWORD,
+            help="Password shared by every seeded user.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = loadgen.seed_prefix(options["seed"])
+        if get_user_model().objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users from seed {options['seed']} already exist; pass a different --seed."
+            )
+        counts = loadgen.seed_campus(
+            users=options["users"],
+            organizers=options["organizers"],
+            events=options["events"],
+            rsvps_per_user=options["rsvps_per_user"],
+            announcements=options["announcements"],
+            days=options["days"],
+            seed=options["seed"],
+            password=options["password"],
+        )
+        self.stdout.write(
+            "Seeded {users} users, {events} events, {rsvps} RSVPs and "
+            "{announcements} announcements.".format(**counts)
+        )
+        self.stdout.write(f"Log in as {prefix}0 with password {options['password']!r}.")
@@ -0,0 +1,318 @@
+import cProfile
+import hashlib
+import json
+import logging
+import mimetypes
+import random
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.dispatch import Signal
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import serializers
+
+from .routers import replica_reads
+
+logger = logging.getLogger("events.profiling")
+
+# The profile of the request being handled on this thread/task, if any
+_current = ContextVar("request_profile", default=None)
+_SLUG_RE = re.compile(r"[^A-Za-z0-9]+")
+# ManifestStaticFilesStorage names: "app.0123456789ab.js"
+_HASHED_NAME_RE = re.compile(r"\.[0-9a-f]{12}\.[^/.]+$")
+STATIC_IMMUTABLE = "public, max-age=31536000, immutable"
+STATIC_REVALIDATE = "public, max-age=0, must-revalidate"
+# Preferred first; suffixes match events.storage.compressed_variants
+STATIC_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+REPLICA_PIN_KEY = "db:pin:{}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class RequestProfile:
+    """Wall time per phase of one request, in milliseconds."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.view_started = None
+        self.timings = {"db": 0.0, "view": 0.0, "serialize": 0.0, "signals": 0.0}
+        self._depth = {}
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.timings["db"] += (time.perf_counter() - started) * 1000
+
+    def call(self, phase, func, *args, **kwargs):
+        """Run ``func`` and charge its time to ``phase``; nested calls count once."""
+        depth = self._depth.get(phase, 0)
+        self._depth[phase] = depth + 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._depth[phase] = depth
+            if depth == 0:
+                self.timings[phase] += (time.perf_counter() - started) * 1000
+
+
+def _timed(phase, func):
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return func(*args, **kwargs)
+        return profile.call(phase, func, *args, **kwargs)
+
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+_installed = False
+
+
+def install_hooks():
+    """Time serializer output and signal dispatch while a request is profiled.
+
+    Patched once, and only when profiling is enabled; outside a profiled
+    request the wrappers fall straight through.
+    """
+    global _installed
+    if _installed:
+        return
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__["data"]
+        cls.data = property(_timed("serialize", prop.fget))
+    Signal.send = _timed("signals", Signal.send)
+    _installed = True
+
+
+class ProfilingMiddleware:
+    """Per-request SQL, view, serializer and signal timings.
+
+    Adds a ``Server-Timing`` header and logs one JSON line per request to
+    ``events.profiling``. A cProfile dump is written for a random
+    ``REQUEST_PROFILING_SAMPLE_RATE`` share of requests, and for requests
+    whose ``REQUEST_PROFILING_HEADER`` carries ``REQUEST_PROFILING_SECRET``
+    (any value while DEBUG is on). Unless ``REQUEST_PROFILING`` is set, the
+    middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.0)
+        header = getattr(settings, "REQUEST_PROFILING_HEADER", "X-Profile")
+        self.header = "HTTP_" + header.upper().replace("-", "_")
+        self.secret = getattr(settings, "REQUEST_PROFILING_SECRET", "")
+        self.dump_dir = Path(
+            getattr(settings, "REQUEST_PROFILING_DIR", settings.BASE_DIR / "profiles")
+        )
+        install_hooks()
+
+    def wants_cprofile(self, request):
+        value = request.META.get(self.header)
+        if value and (settings.DEBUG or (self.secret and value == self.secret)):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = cProfile.Profile() if self.wants_cprofile(request) else None
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.execute_wrapper))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+                    if profile.view_started is not None:
+                        elapsed = time.perf_counter() - profile.view_started
+                        profile.timings["view"] = elapsed * 1000
+        finally:
+            _current.reset(token)
+        total = (time.perf_counter() - started) * 1000
+
+        dump = self.write_dump(profiler, request) if profiler is not None else None
+        timings = profile.timings
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings["db"]:.1f};desc="{profile.db_queries} queries"',
+                f'view;dur={timings["view"]:.1f}',
+                f'serialize;dur={timings["serialize"]:.1f}',
+                f'signals;dur={timings["signals"]:.1f}',
+                f"total;dur={total:.1f}",
+            ]
+        )
+        logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "total_ms": round(total, 2),
+                    "db_queries": profile.db_queries,
+                    **{f"{k}_ms": round(v, 2) for k, v in timings.items()},
+                    "profile": str(dump) if dump else None,
+                }
+            )
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Listed last in MIDDLEWARE, so from here until get_response returns
+        # is the view itself plus response rendering.
+        profile = _current.get()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+        return None
+
+    def write_dump(self, profiler, request):
+        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        slug = _SLUG_RE.sub("-", request.path).strip("-") or "root"
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{slug[:80]}"
+        path = self.dump_dir / f"{name}-{random.randrange(16**6):06x}.prof"
+        profiler.dump_stats(path)
+        return path
+
+
+def accepted_encodings(header):
+    """Codings the client accepts (q > 0) from an Accept-Encoding header."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """Serve collected static files, choosing a ``.br``/``.gz`` variant by Accept-Encoding.
+
+    Content-hashed names (events.storage.CompressedManifestStaticFilesStorage)
+    are cached as immutable for a year; anything else must revalidate.
+    Paths not found under ``STATIC_ROOT`` fall through to the rest of the
+    stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT or "://" in settings.STATIC_URL:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.root = Path(settings.STATIC_ROOT).resolve()
+        self.prefix = "/" + settings.STATIC_URL.lstrip("/")
+
+    def __call__(self, request):
+        if request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        path = (self.root / name).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        served, encoding = path, None
+        for coding, suffix in STATIC_ENCODINGS:
+            variant = path.with_name(path.name + suffix)
+            if coding in accepted and variant.is_file():
+                served, encoding = variant, coding
+                break
+
+        stat = served.stat()
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(stat.st_mtime)
+        )
+        if response is None:
+            content_type, _ = mimetypes.guess_type(path.name)
+            response = FileResponse(
+                served.open("rb"), content_type=content_type or "application/octet-stream"
+            )
+            response.headers.pop("Content-Disposition", None)
+            if encoding:
+                response["Content-Encoding"] = encoding
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(stat.st_mtime)
+        response["Cache-Control"] = (
+            STATIC_IMMUTABLE if _HASHED_NAME_RE.search(path.name) else STATIC_REVALIDATE
+        )
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Let safe requests read from a replica (events.routers.ReplicaRouter).
+
+    Unsafe requests use the primary throughout. After one succeeds, its
+    client (by auth token or session cookie) stays on the primary for
+    ``DATABASE_REPLICA_PIN_SECONDS`` so it reads its own writes while the
+    replicas catch up. Pins live in the cache, so workers must share one
+    for pins to hold across processes. Without ``DATABASE_REPLICAS`` the
+    middleware removes itself at startup.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "DATABASE_REPLICAS", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", 5)
+
+    def client_keys(self, request, response=None):
+        credentials = [
+            request.headers.get("Authorization"),
+            request.COOKIES.get(settings.AUTH_TOKEN_COOKIE_NAME),
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME),
+        ]
+        if response is not None:
+            # A login sets the credential the next request will carry
+            for name in (settings.AUTH_TOKEN_COOKIE_NAME, settings.SESSION_COOKIE_NAME):
+                if name in response.cookies:
+                    credentials.append(response.cookies[name].value)
+        return [
+            REPLICA_PIN_KEY.format(hashlib.sha256(c.encode("utf-8")).hexdigest())
+            for c in credentials
+            if c
+        ]
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                keys = self.client_keys(request, response)
+                cache.set_many(dict.fromkeys(keys, True), self.pin_seconds)
+            return response
+
+        keys = self.client_keys(request)
+        pinned = bool(keys) and bool(cache.get_many(keys))
+        token = replica_reads.set(not pinned)
+        try:
+            return self.get_response(request)
+        finally:
+            replica_reads.reset(token)
@@ -14,6 +14,10 @@ class Profile(models.Model):
     notifications_opt_out = models.BooleanField(default=False)  # for US-7
     about_me = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Storage names of the resized avatars, {"64": {"webp": ..., "jpg": ...}}; see events.avatars
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Secret for the personal iCalendar feed (events.ics); rotating it revokes old links
+    calendar_token = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.user.username} profile"
@@ -33,23 +37,86 @@ class Event(models.Model):
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
     map_link = models.URLField(blank=True)
+    # Maximum 'going' RSVPs; further ones are waitlisted (events.seats). None is unlimited.
+    capacity = models.PositiveIntegerField(null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized RSVP tallies, kept in step by events.counters
+    going_count = models.IntegerField(default=0, editable=False)
+    maybe_count = models.IntegerField(default=0, editable=False)
+    not_going_count = models.IntegerField(default=0, editable=False)
+    waitlisted_count = models.IntegerField(default=0, editable=False)
 
     class Meta:
-        ordering = ["start_time"]
+        ordering = ["start_time", "id"]
+        indexes = [
+            # Seek index for keyset pagination of the events list.
+            models.Index(fields=["start_time", "id"], name="event_start_id_idx"),
+            # Interval-overlap lookups for calendar ranges.
+            models.Index(fields=["start_time", "end_time"], name="event_start_end_idx"),
+            # Bounding-box prefilter for proximity search.
+            models.Index(fields=["latitude", "longitude"], name="event_lat_lon_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what was loaded so saves can diff in memory
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def build_map_link(self):
+        """Basic Google Maps link from lat/lon or the address ('' if neither)."""
+        if self.latitude is not None and self.longitude is not None:
+            return f"https://maps.google.com/?q={self.latitude},{self.longitude}"
+        if self.address:
+            from urllib.parse import quote_plus
+
+            return f"https://maps.google.com/?q={quote_plus(self.address)}"
+        return ""
+
+    def get_dirty_fields(self):
+        """Attnames changed since the instance was loaded, or None if unknown."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return None
+        dirty = []
+        for field in self._meta.concrete_fields:
+            name = field.attname
+            if field.primary_key or name not in self.__dict__:
+                continue  # deferred and never assigned
+            if name not in loaded or loaded[name] != self.__dict__[name]:
+                dirty.append(name)
+        return dirty
 
     def save(self, *args, **kwargs):
         # Auto-build a basic Google Maps link if lat/lon or address exists
         if not self.map_link:
-            if self.latitude is not None and self.longitude is not None:
-                self.map_link = (
-                    f"https://maps.google.com/?q={self.latitude},{self.longitude}"
-                )
-            elif self.address:
-                from urllib.parse import quote_plus
-
-                self.map_link = f"https://maps.google.com/?q={quote_plus(self.address)}"
+            self.map_link = self.build_map_link()
+        # Write only the changed columns; an unchanged instance is not written.
+        # This also keeps stale RSVP counters from overwriting F() updates.
+        dirty = None if args or self._state.adding else self.get_dirty_fields()
+        if dirty is not None and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = dirty + ["updated_at"] if dirty else []
         super().save(*args, **kwargs)
+        self._loaded_values = {}
+        self._snapshot(self._meta.concrete_fields)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Reloaded values are the new baseline, so changes made elsewhere
+        # (including F() counter updates) don't read as local edits
+        if fields is None:
+            refreshed = self._meta.concrete_fields
+        else:
+            refreshed = [self._meta.get_field(name) for name in fields]
+        if getattr(self, "_loaded_values", None) is None:
+            self._loaded_values = {}
+        self._snapshot(f for f in refreshed if f.concrete)
+
+    def _snapshot(self, fields):
+        for field in fields:
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self.__dict__[field.attname]
 
     def __str__(self):
         return self.title
@@ -59,20 +126,39 @@ class RSVP(models.Model):
     GOING = "going"
     MAYBE = "maybe"
     NOT_GOING = "not_going"
+    # Asked for 'going' on a full event; promoted in waitlisted_at order
+    WAITLISTED = "waitlisted"
     STATUS_CHOICES = [
         (GOING, "Going"),
         (MAYBE, "Maybe"),
         (NOT_GOING, "Not Going"),
+        (WAITLISTED, "Waitlisted"),
     ]
+    # What users may ask for; WAITLISTED is assigned by events.seats
+    REQUESTABLE_STATUSES = [GOING, MAYBE, NOT_GOING]
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="rsvps"
     )
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="rsvps")
     status = models.CharField(max_length=16, choices=STATUS_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
+    waitlisted_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = ("user", "event")
+        indexes = [
+            # Next in line for a freed seat
+            models.Index(
+                fields=["event", "status", "waitlisted_at", "id"], name="rsvp_waitlist_idx"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so the counter signal can diff on save
+        instance._loaded_status = dict(zip(field_names, values)).get("status")
+        return instance
 
     def __str__(self):
         return f"{self.user} -> {self.event} [{self.status}]"
@@ -105,3 +191,43 @@ class Notification(models.Model):
     link = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Inbox listing and unread counts per user, newest first.
+            models.Index(fields=["user", "read", "-created_at"], name="notif_user_read_created_idx"),
+        ]
+
+
+class NotificationOutbox(models.Model):
+    """Durable queue of notification fan-outs, drained by process_notification_outbox."""
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (PROCESSING, "Processing"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+    event = models.ForeignKey(
+        Event, on_delete=models.CASCADE, related_name="outbox_entries"
+    )
+    summary = models.CharField(max_length=255)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Next time the entry may be picked up (retry backoff / processing lease)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_avail_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event} [{self.status}] {self.summary}"
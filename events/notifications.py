@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Notification
+
+UNREAD_KEY = "notifications:unread:{}"
+# Counts are invalidated on every change, so this only bounds staleness
+# left behind by writes that bypass the helpers below
+UNREAD_CACHE_TIMEOUT = 60 * 10
+
+
+def unread_count(user_id):
+    """Unread notifications for ``user_id``; counted once, then served from cache."""
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(user_id=user_id, read=False).count()
+        cache.set(key, count, UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    """Forget cached counts; repeated on commit so a count read mid-transaction cannot stick."""
+    keys = [UNREAD_KEY.format(user_id) for user_id in user_ids]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def mark_read(notification):
+    if notification.read:
+        return
+    notification.read = True
+    notification.save(update_fields=["read"])
+    invalidate_unread_counts([notification.user_id])
+
+
+def mark_all_read(user_id):
+    """Mark every unread notification of the user as read in one UPDATE."""
+    updated = Notification.objects.filter(user_id=user_id, read=False).update(read=True)
+    if updated:
+        invalidate_unread_counts([user_id])
+    return updated
@@ -0,0 +1,149 @@
+import logging
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Notification, NotificationOutbox, RSVP
+from .notifications import invalidate_unread_counts
+from .push import publish
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+MAX_ATTEMPTS = 5
+RETRY_BACKOFF_SECONDS = 30
+# How long a claimed entry stays invisible to other workers
+LEASE_SECONDS = 300
+
+
+def enqueue_notification(event, summary):
+    """Record a fan-out to the event's 'going' users; the worker delivers it."""
+    return NotificationOutbox.objects.create(event=event, summary=summary[:255])
+
+
+def claim_entries(limit):
+    """Lease up to ``limit`` due entries for this worker.
+
+    Each claim is a conditional UPDATE, so concurrent workers never pick up
+    the same entry. Entries whose lease expired (a crashed worker) are
+    picked up again.
+    """
+    now = timezone.now()
+    due = (
+        NotificationOutbox.objects.filter(
+            Q(status=NotificationOutbox.PENDING) | Q(status=NotificationOutbox.PROCESSING),
+            available_at__lte=now,
+        )
+        .order_by("available_at", "id")
+        .values_list("id", "available_at")[:limit]
+    )
+    claimed = []
+    for pk, available_at in due:
+        won = NotificationOutbox.objects.filter(pk=pk, available_at=available_at).update(
+            status=NotificationOutbox.PROCESSING,
+            available_at=now + timedelta(seconds=LEASE_SECONDS),
+            attempts=F("attempts") + 1,
+        )
+        if won:
+            claimed.append(pk)
+    return list(
+        NotificationOutbox.objects.filter(pk__in=claimed)
+        .select_related("event")
+        .order_by("id")
+    )
+
+
+def recipients_for(event):
+    """(id, email) of every 'going' user who has not opted out, in one query."""
+    return (
+        get_user_model()
+        .objects.filter(rsvps__event=event, rsvps__status=RSVP.GOING)
+        .exclude(profile__notifications_opt_out=True)
+        .order_by("pk")
+        .values_list("pk", "email")
+    )
+
+
+def deliver(entry, batch_size=BATCH_SIZE):
+    """Write the entry's notifications in batches, then send the emails.
+
+    Notifications are inserted in a single transaction so a retry after a
+    failure never produces duplicates. Returns the number of recipients.
+    """
+    event = entry.event
+    emails = []
+    user_ids = []
+    pushed = []
+    count = 0
+    with transaction.atomic():
+        batch = []
+        for uid, email in recipients_for(event).iterator(chunk_size=batch_size):
+            batch.append(
+                Notification(user_id=uid, event=event, summary=entry.summary, link="")
+            )
+            user_ids.append(uid)
+            if email:
+                emails.append(email)
+            if len(batch) >= batch_size:
+                Notification.objects.bulk_create(batch)
+                pushed.extend(NotificationSerializer(batch, many=True).data)
+                count += len(batch)
+                batch = []
+        if batch:
+            Notification.objects.bulk_create(batch)
+            pushed.extend(NotificationSerializer(batch, many=True).data)
+            count += len(batch)
+        # Only after commit, so streams never announce rows a rollback undid
+        transaction.on_commit(
+            lambda: publish((uid, data) for uid, data in zip(user_ids, pushed))
+        )
+    invalidate_unread_counts(user_ids)
+
+    # Email (dev: console backend); one connection for the whole fan-out
+    connection = get_connection(fail_silently=True)
+    connection.send_messages(
+        [
+            EmailMessage(
+                subject=f"Update for {event.title}", body=entry.summary, to=[email]
+            )
+            for email in emails
+        ]
+    )
+    return count
+
+
+def process_entry(entry, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    try:
+        deliver(entry, batch_size=batch_size)
+    except Exception as exc:
+        logger.exception("Notification outbox entry %s failed", entry.pk)
+        if entry.attempts >= max_attempts:
+            status, available_at = NotificationOutbox.FAILED, timezone.now()
+        else:
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (entry.attempts - 1)
+            status = NotificationOutbox.PENDING
+            available_at = timezone.now() + timedelta(seconds=delay)
+        NotificationOutbox.objects.filter(pk=entry.pk).update(
+            status=status, available_at=available_at, last_error=repr(exc)
+        )
+        return False
+    NotificationOutbox.objects.filter(pk=entry.pk).update(
+        status=NotificationOutbox.DONE, processed_at=timezone.now(), last_error=""
+    )
+    return True
+
+
+def process_outbox(limit=100, batch_size=BATCH_SIZE, max_attempts=MAX_ATTEMPTS):
+    """Drain one round of due entries. Returns (delivered, failed) counts."""
+    delivered = failed = 0
+    for entry in claim_entries(limit):
+        if process_entry(entry, batch_size=batch_size, max_attempts=max_attempts):
+            delivered += 1
+        else:
+            failed += 1
+    return delivered, failed
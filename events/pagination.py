@@ -0,0 +1,182 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keep full microsecond precision; the seek compares for equality."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on the full ordering key.
+
+    Unlike OFFSET paging, every page is a single indexed range scan
+    (``WHERE (start_time, id) > (..)``), so cost stays flat with depth.
+    The ordering is taken from the queryset (falling back to the model's
+    ``Meta.ordering``) and ``id`` is always appended as a tie-breaker.
+    Ordering fields must be non-null.
+    """
+
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        values, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [(name, not desc) for name, desc in ordering]
+        queryset = queryset.order_by(
+            *[f"-{name}" if desc else name for name, desc in ordering]
+        )
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, values))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+            self.has_next = values is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = values is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        fields = list(queryset.query.order_by) or list(
+            queryset.model._meta.ordering
+        )
+        ordering = []
+        for field in fields:
+            name = str(field)
+            desc = name.startswith("-")
+            name = name.lstrip("-")
+            ordering.append(("id" if name == "pk" else name, desc))
+        if not any(name == "id" for name, _ in ordering):
+            ordering.append(("id", False))
+        return ordering
+
+    def _seek_filter(self, ordering, values):
+        # (a, b, c) > (x, y, z)  ==>  a > x OR (a = x AND b > y) OR ...
+        condition = Q()
+        equal = {}
+        for (name, desc), value in zip(ordering, values):
+            lookup = f"{name}__lt" if desc else f"{name}__gt"
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            data = json.loads(urlsafe_b64decode(padded.encode("ascii")))
+            values, reverse = data["v"], bool(data["r"])
+        except (BinasciiError, KeyError, TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def encode_cursor(self, obj, reverse):
+        values = [getattr(obj, name) for name, _ in self.ordering]
+        data = json.dumps({"v": values, "r": int(reverse)}, cls=CursorEncoder)
+        encoded = urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded.rstrip("="))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Walked off the end; the previous page starts from the beginning.
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor returned in `next`/`previous`.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+
+class EventCursorPagination(KeysetPagination):
+    """Keyset pagination for the events list.
+
+    Pages by ``(start_time, id)`` by default and by ``(distance_km, id)``
+    on proximity searches, following the queryset's ordering.
+    """
+
+    page_size = 50
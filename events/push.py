@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import socket
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+# Seconds between SSE comments that keep idle connections (and proxies) open
+HEARTBEAT_SECONDS = 15
+# Messages buffered per connection before a slow client is told to reconnect
+QUEUE_SIZE = 100
+# Sent to a stream whose queue overflowed; it closes so the client reconnects
+# with Last-Event-ID and catches up from the database
+RESYNC = object()
+
+
+class Hub:
+    """In-process pub/sub from publishers on any thread to streams on event loops."""
+
+    def __init__(self):
+        self._subscribers = {}  # user_id -> {queue: loop}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(user_id, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            queues = self._subscribers.get(user_id)
+            if queues is not None:
+                queues.pop(queue, None)
+                if not queues:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, message):
+        with self._lock:
+            targets = list(self._subscribers.get(user_id, {}).items())
+        for queue, loop in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:  # loop closed under a stream that never unsubscribed
+                self.unsubscribe(user_id, queue)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(queues) for queues in self._subscribers.values())
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+hub = Hub()
+
+
+def broker_address():
+    """``PUSH_BROKER_ADDRESS``: ``"unix:/path"`` or ``"host:port"``, or None for in-process only."""
+    return getattr(settings, "PUSH_BROKER_ADDRESS", None)
+
+
+def streaming_available(request):
+    """True when served over ASGI with a broker, so pushes from the outbox
+    worker (a separate process) can reach this process's streams."""
+    return isinstance(request, ASGIRequest) and bool(broker_address())
+
+
+def _split_address(address):
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def publish(messages):
+    """Push ``(user_id, data)`` pairs to connected streams; best effort.
+
+    With a broker configured the messages go through it, reaching streams
+    in every worker process (including this one); otherwise straight to
+    this process's hub.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    address = broker_address()
+    if not address:
+        for user_id, data in messages:
+            hub.publish(user_id, data)
+        return
+    family, target = _split_address(address)
+    payload = "".join(
+        json.dumps({"user": user_id, "data": data}, default=str) + "\n"
+        for user_id, data in messages
+    ).encode("utf-8")
+    try:
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.settimeout(2.0)
+            sock.connect(target)
+            sock.sendall(payload)
+    except OSError:
+        logger.warning("Push broker at %s unreachable; dropped %d messages", address, len(messages))
+
+
+async def _open_connection(address):
+    family, target = _split_address(address)
+    if family == socket.AF_UNIX:
+        return await asyncio.open_unix_connection(target)
+    return await asyncio.open_connection(*target)
+
+
+# ---------- Broker ----------
+async def serve_broker(address):
+    """Relay published lines to every subscribed worker (see run_push_broker)."""
+    subscribers = set()
+
+    async def handle(reader, writer):
+        try:
+            first = await reader.readline()
+            if first.strip() == b"SUBSCRIBE":
+                subscribers.add(writer)
+                await reader.read()  # hold until the worker disconnects
+                return
+            line = first
+            while line:
+                for subscriber in list(subscribers):
+                    try:
+                        subscriber.write(line)
+                    except (ConnectionError, RuntimeError):
+                        subscribers.discard(subscriber)
+                line = await reader.readline()
+        finally:
+            subscribers.discard(writer)
+            writer.close()
+
+    family, target = _split_address(address)
+    if family == socket.AF_UNIX:
+        server = await asyncio.start_unix_server(handle, path=target)
+    else:
+        server = await asyncio.start_server(handle, *target)
+    async with server:
+        await server.serve_forever()
+
+
+_listeners = {}  # event loop -> broker listener task
+_listeners_lock = threading.Lock()
+
+
+async def _listen(address):
+    delay = 0.5
+    while True:
+        try:
+            reader, writer = await _open_connection(address)
+            try:
+                writer.write(b"SUBSCRIBE\n")
+                await writer.drain()
+                delay = 0.5
+                async for line in reader:
+                    message = json.loads(line)
+                    hub.publish(message["user"], message["data"])
+            finally:
+                writer.close()
+        except asyncio.CancelledError:
+            raise
+        except (OSError, ValueError, KeyError):
+            logger.warning("Lost push broker at %s; reconnecting", address)
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def ensure_listener():
+    """Start this loop's broker subscription once, if a broker is configured."""
+    address = broker_address()
+    if not address:
+        return
+    loop = asyncio.get_running_loop()
+    with _listeners_lock:
+        task = _listeners.get(loop)
+        if task is None or task.done():
+            _listeners[loop] = loop.create_task(_listen(address))
+
+
+# ---------- Server-sent events ----------
+def format_event(data):
+    return f"id: {data['id']}\nevent: notification\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def missed_notifications(user_id, last_event_id):
+    queryset = Notification.objects.filter(
+        user_id=user_id, read=False, id__gt=last_event_id
+    ).order_by("id")[:QUEUE_SIZE]
+    return NotificationSerializer(queryset, many=True).data
+
+
+async def sse_stream(user_id, last_event_id=None, heartbeat=HEARTBEAT_SECONDS):
+    """Yield SSE frames for ``user_id`` until the client goes away.
+
+    Subscribes before replaying unread notifications newer than
+    ``last_event_id`` so nothing published in between is lost; ids
+    already sent are skipped.
+    """
+    ensure_listener()
+    queue = hub.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        sent = last_event_id or 0
+        if last_event_id is not None:
+            for data in await sync_to_async(missed_notifications)(user_id, last_event_id):
+                sent = max(sent, data["id"])
+                yield format_event(data)
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if message is RESYNC:
+                return
+            if message["id"] <= sent:
+                continue
+            sent = message["id"]
+            yield format_event(message)
+    finally:
+        hub.unsubscribe(user_id, queue)
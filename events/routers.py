@@ -0,0 +1,71 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set by events.middleware.ReplicaRoutingMiddleware for requests whose reads
+# may be served by a replica; everything else reads from the primary.
+replica_reads = ContextVar("replica_reads", default=False)
+
+# alias -> time.monotonic() before which a failed replica is skipped
+_down_until = {}
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def mark_down(alias):
+    retry = getattr(settings, "DATABASE_REPLICA_RETRY_SECONDS", 30)
+    _down_until[alias] = time.monotonic() + retry
+    logger.warning("Replica %r unavailable; reading from the primary for %ss", alias, retry)
+
+
+def is_healthy(alias):
+    if _down_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        mark_down(alias)
+        return False
+    _down_until.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    """A random healthy replica alias, or None to use the primary."""
+    aliases = replica_aliases()
+    random.shuffle(aliases)
+    for alias in aliases:
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Send reads to ``DATABASE_REPLICAS`` where the middleware allows it; writes to the primary.
+
+    Reads stay on the primary outside requests (management commands,
+    workers), inside a transaction, and when no replica is healthy.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
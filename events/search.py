@@ -0,0 +1,144 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Event
+
+SEARCH_FIELDS = ["title", "description", "perks", "location_name", "address"]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BaseSearchBackend:
+    """Full-text search over events for the ``q`` parameter.
+
+    Backends that keep their own index are told about every saved or deleted
+    event through ``index``/``remove`` and can be rebuilt from scratch.
+    ``search`` narrows a queryset to matches and, where the backend can rank,
+    annotates ``search_rank`` (lower is better) and orders by it.
+    """
+
+    def setup(self):
+        pass
+
+    def index(self, events):
+        pass
+
+    def remove(self, event_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        pass
+
+    def search(self, queryset, query, prefix=False):
+        raise NotImplementedError
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """Unindexed ``LIKE '%..%'`` matching; works on any database."""
+
+    def search(self, queryset, query, prefix=False):
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f"{field}__icontains": query})
+        return queryset.filter(condition)
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """SQLite FTS5 index keyed by ``Event.id`` and ranked with bm25."""
+
+    table = "events_event_fts"
+    # bm25 column weights, in SEARCH_FIELDS order
+    weights = (10.0, 1.0, 4.0, 2.0, 1.0)
+
+    def setup(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(SEARCH_FIELDS)}, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def index(self, events):
+        rows = [
+            (event.pk, *[getattr(event, field) or "" for field in SEARCH_FIELDS])
+            for event in events
+        ]
+        if not rows:
+            return
+        placeholders = ", ".join(["%s"] * (len(SEARCH_FIELDS) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s", [(r[0],) for r in rows]
+            )
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+
+    def remove(self, event_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.table} WHERE rowid = %s",
+                [(pk,) for pk in event_ids],
+            )
+
+    def rebuild(self, batch_size=1000):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+        batch = []
+        for event in Event.objects.only("id", *SEARCH_FIELDS).iterator(
+            chunk_size=batch_size
+        ):
+            batch.append(event)
+            if len(batch) >= batch_size:
+                self.index(batch)
+                batch = []
+        self.index(batch)
+
+    def build_match(self, query, prefix=False):
+        # Quote every token so user input can never be parsed as FTS syntax.
+        suffix = "*" if prefix else ""
+        return " ".join(f'"{token}"{suffix}' for token in _TOKEN_RE.findall(query))
+
+    def search(self, queryset, query, prefix=False):
+        match = self.build_match(query, prefix=prefix)
+        if not match:
+            return queryset.none()
+        event_table = Event._meta.db_table
+        weights = ", ".join(str(w) for w in self.weights)
+        # Join the index so MATCH (and bm25's per-query statistics) runs once;
+        # a correlated subquery per row makes broad terms quadratic. The unary
+        # "+" keeps SQLite from probing the index by rowid, so it scans the
+        # matches and looks each event up by primary key.
+        return (
+            queryset.extra(
+                tables=[self.table],
+                where=[
+                    f"{self.table} MATCH %s",
+                    f"{event_table}.id = +{self.table}.rowid",
+                ],
+                params=[match],
+            )
+            .annotate(
+                search_rank=RawSQL(
+                    f"bm25({self.table}, {weights})", (), output_field=FloatField()
+                )
+            )
+            .order_by("search_rank", "id")
+        )
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    path = getattr(settings, "EVENTS_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "sqlite":
+        return SQLiteFTS5Backend()
+    return IContainsSearchBackend()
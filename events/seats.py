@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .caching import bump_version, event_rsvps_scope, user_rsvps_scope
+from .counters import apply_rsvp_count_deltas
+from .models import Event, Notification, Profile, RSVP
+from .notifications import invalidate_unread_counts
+
+
+def claim_seat(event_id, from_waitlist=False):
+    """Take one seat with a single conditional UPDATE; False if the event is full.
+
+    ``going_count`` is the seat counter, so concurrent claims can't
+    oversell: the database re-checks ``going_count < capacity`` on the row
+    it increments. A promoted claim moves the counter off the waitlist in
+    the same statement.
+    """
+    changes = {"going_count": F("going_count") + 1}
+    if from_waitlist:
+        changes["waitlisted_count"] = F("waitlisted_count") - 1
+    return bool(
+        Event.objects.filter(
+            Q(capacity__isnull=True) | Q(going_count__lt=F("capacity")), pk=event_id
+        ).update(**changes)
+    )
+
+
+def allocate_rsvp(user, event_id, status):
+    """Set ``user``'s RSVP on a capacity-limited event; returns ``(rsvp, created)``.
+
+    Asking for "going" takes a seat if one is free and otherwise joins (or
+    keeps a place on) the waitlist. Leaving "going" hands the seat to the
+    longest-waiting user in the same transaction. Counters are maintained
+    here rather than by the RSVP signal.
+    """
+    with transaction.atomic():
+        rsvp = RSVP.objects.select_for_update().filter(user=user, event_id=event_id).first()
+        created = rsvp is None
+        old_status = None if created else rsvp.status
+        claimed = False
+        if status == RSVP.GOING and old_status != RSVP.GOING:
+            claimed = claim_seat(event_id, from_waitlist=old_status == RSVP.WAITLISTED)
+            if not claimed:
+                status = RSVP.WAITLISTED
+        if status == old_status:
+            return rsvp, False
+
+        # A successful claim already counted the seat (and left the waitlist)
+        changes = {}
+        if old_status is not None and not (claimed and old_status == RSVP.WAITLISTED):
+            changes[old_status] = -1
+        if not claimed:
+            changes[status] = 1
+        apply_rsvp_count_deltas({event_id: changes})
+
+        if created:
+            rsvp = RSVP(user=user, event_id=event_id)
+        rsvp.status = status
+        rsvp.waitlisted_at = timezone.now() if status == RSVP.WAITLISTED else None
+        rsvp._counts_applied = True
+        rsvp.save()
+
+        if old_status == RSVP.GOING:
+            promote_waitlist(event_id)
+    return rsvp, created
+
+
+def promote_waitlist(event_id):
+    """Move waitlisted RSVPs into free seats, longest-waiting first.
+
+    Each promotion is a claim plus one UPDATE. Returns the promoted user ids.
+    """
+    promoted = []
+    with transaction.atomic():
+        while True:
+            candidate = (
+                RSVP.objects.select_for_update(skip_locked=True)
+                .filter(event_id=event_id, status=RSVP.WAITLISTED)
+                .order_by("waitlisted_at", "id")
+                .values_list("pk", "user_id")
+                .first()
+            )
+            if candidate is None or not claim_seat(event_id, from_waitlist=True):
+                break
+            RSVP.objects.filter(pk=candidate[0]).update(status=RSVP.GOING, waitlisted_at=None)
+            promoted.append(candidate[1])
+        if promoted:
+            # Queryset updates skip the RSVP signals
+            bump_version(event_rsvps_scope(event_id), *(user_rsvps_scope(uid) for uid in promoted))
+            notify_promoted(event_id, promoted)
+    return promoted
+
+
+def notify_promoted(event_id, user_ids):
+    # Imported here: push pulls in the serializers, which use this module.
+    from .push import publish
+    from .serializers import NotificationSerializer
+
+    # Same policy as the outbox fan-out: opted-out users get nothing
+    opted_out = set(
+        Profile.objects.filter(user_id__in=user_ids, notifications_opt_out=True).values_list(
+            "user_id", flat=True
+        )
+    )
+    user_ids = [uid for uid in user_ids if uid not in opted_out]
+    if not user_ids:
+        return
+    title = Event.objects.filter(pk=event_id).values_list("title", flat=True).first()
+    rows = Notification.objects.bulk_create(
+        [
+            Notification(
+                user_id=uid, event_id=event_id, summary=f"A seat opened up: you're going to '{title}'"
+            )
+            for uid in user_ids
+        ]
+    )
+    data = NotificationSerializer(rows, many=True).data
+    transaction.on_commit(lambda: publish(zip(user_ids, data)))
+    invalidate_unread_counts(user_ids)
@@ -5,9 +5,16 @@ from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
 
 from rest_framework import serializers
 
+from .avatars import variant_urls
+from .caching import bump_version, event_rsvps_scope, user_rsvps_scope
+from .counters import apply_rsvp_count_deltas
+from .locking import retry_on_lock
+from .seats import allocate_rsvp
 from .models import Profile, Event, RSVP, Announcement, Notification
 
 
@@ -24,10 +31,30 @@ class UserSerializer(serializers.ModelSerializer):
 class ProfileSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source="user_id", read_only=True)
     user = UserSerializer(read_only=True)
+    profile_picture_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Profile
-        fields = ["id", "user", "is_organizer", "notifications_opt_out", "about_me", "profile_picture"]
+        fields = [
+            "id",
+            "user",
+            "is_organizer",
+            "notifications_opt_out",
+            "about_me",
+            "profile_picture",
+            "profile_picture_variants",
+        ]
+
+    def get_profile_picture_variants(self, obj):
+        # {"32": {"webp": url, "jpg": url}, "64": ..., "256": ...}; empty until processed
+        request = self.context.get("request")
+        urls = variant_urls(obj)
+        if request is not None:
+            urls = {
+                size: {fmt: request.build_absolute_uri(url) for fmt, url in formats.items()}
+                for size, formats in urls.items()
+            }
+        return urls
 
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
@@ -36,6 +63,13 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         fields = ["is_organizer", "notifications_opt_out", "about_me", "profile_picture"]
 
 
+class ProfileSelfUpdateSerializer(serializers.ModelSerializer):
+    # Organizer status is granted by server owners, not self-assigned
+    class Meta:
+        model = Profile
+        fields = ["notifications_opt_out", "about_me", "profile_picture"]
+
+
 class OrganizerStatusSerializer(serializers.Serializer):
     is_organizer = serializers.BooleanField(default=True)
 
@@ -116,7 +150,10 @@ class EventSerializer(serializers.ModelSerializer):
     going_count = serializers.IntegerField(read_only=True)
     maybe_count = serializers.IntegerField(read_only=True)
     not_going_count = serializers.IntegerField(read_only=True)
+    waitlisted_count = serializers.IntegerField(read_only=True)
     my_rsvp = serializers.SerializerMethodField()
+    # Only present on proximity searches (?lat=&lon=)
+    distance_km = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Event
@@ -132,12 +169,15 @@ class EventSerializer(serializers.ModelSerializer):
             "latitude",
             "longitude",
             "map_link",
+            "capacity",
             "created_by",
             "updated_at",
             "going_count",
             "maybe_count",
             "not_going_count",
+            "waitlisted_count",
             "my_rsvp",
+            "distance_km",
         ]
     read_only_fields = [
             "latitude",
@@ -148,13 +188,19 @@ class EventSerializer(serializers.ModelSerializer):
             "going_count",
             "maybe_count",
             "not_going_count",
+            "waitlisted_count",
             "my_rsvp",
         ]
 
     def get_my_rsvp(self, obj):
         request = self.context.get("request")
         user = getattr(request, "user", None)
+        if self.context.get("shared_listing"):
+            return None  # filled in per user after the shared cache
         if user and getattr(user, "is_authenticated", False):
+            # EventViewSet annotates the status; fall back to a lookup otherwise
+            if hasattr(obj, "my_rsvp_status"):
+                return obj.my_rsvp_status
             r = RSVP.objects.filter(user=user, event=obj).only("status").first()
             return r.status if r else None
         return None
@@ -179,19 +225,133 @@ class RSVPSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RSVP
-        fields = ["id", "user", "event", "status", "created_at"]
-        read_only_fields = ["created_at"]
-
+        fields = ["id", "user", "event", "status", "created_at", "waitlisted_at"]
+        read_only_fields = ["created_at", "waitlisted_at"]
+
+    def validate_event(self, value):
+        # Moving an RSVP would bypass seat allocation on both events
+        if self.instance is not None and value.pk != self.instance.event_id:
+            raise serializers.ValidationError("An RSVP can't be moved to another event.")
+        return value
+
+    def validate_status(self, value):
+        if value not in RSVP.REQUESTABLE_STATUSES:
+            raise serializers.ValidationError(
+                "'waitlisted' can't be requested; full events waitlist 'going' RSVPs."
+            )
+        return value
+
+    @retry_on_lock
     def create(self, validated_data):
         user = self.context["request"].user
         event = validated_data.get("event")
         status = validated_data.get("status")
+        if event.capacity is not None:
+            # Seats are claimed atomically; "going" may come back "waitlisted"
+            obj, _created = allocate_rsvp(user, event.pk, status)
+            return obj
         # Upsert: if an RSVP exists for this user+event, update it; otherwise create
         obj, _created = RSVP.objects.update_or_create(
             user=user, event=event, defaults={"status": status}
         )
         return obj
 
+    @retry_on_lock
+    def update(self, instance, validated_data):
+        validated_data.pop("event", None)  # same event; see validate_event
+        if instance.event.capacity is not None:
+            obj, _created = allocate_rsvp(
+                instance.user, instance.event_id, validated_data.get("status", instance.status)
+            )
+            return obj
+        return super().update(instance, validated_data)
+
+
+class EventImportRequestSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+
+class RSVPBulkItemSerializer(serializers.Serializer):
+    event = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=RSVP.REQUESTABLE_STATUSES)
+
+
+class RSVPBulkSerializer(serializers.Serializer):
+    """Set the current user's RSVP on many events at once."""
+
+    rsvps = RSVPBulkItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+    @retry_on_lock
+    def create(self, validated_data):
+        user = self.context["request"].user
+        items = validated_data["rsvps"]
+
+        with transaction.atomic():
+            # One query validates every event id and fetches the current
+            # status and capacity
+            current = {
+                pk: (my_status, capacity)
+                for pk, my_status, capacity in Event.objects.filter(
+                    pk__in={item["event"] for item in items}
+                )
+                .annotate(
+                    my_status=Subquery(
+                        RSVP.objects.filter(event=OuterRef("pk"), user=user).values(
+                            "status"
+                        )[:1]
+                    )
+                )
+                .values_list("pk", "my_status", "capacity")
+            }
+
+            results, rows, deltas, seen = [], [], {}, set()
+            for item in items:
+                event_id, status = item["event"], item["status"]
+                result = {"event": event_id, "status": status}
+                if event_id not in current:
+                    result.update(result="error", error="Event not found.")
+                elif event_id in seen:
+                    result.update(result="error", error="Duplicate event in request.")
+                else:
+                    seen.add(event_id)
+                    old_status, capacity = current[event_id]
+                    if capacity is not None:
+                        # Seats can't be allocated set-wise; claim them one by one
+                        rsvp, created = allocate_rsvp(user, event_id, status)
+                        result["status"] = rsvp.status
+                        if created:
+                            result["result"] = "created"
+                        else:
+                            result["result"] = "unchanged" if rsvp.status == old_status else "updated"
+                    elif old_status == status:
+                        result["result"] = "unchanged"
+                    else:
+                        result["result"] = "created" if old_status is None else "updated"
+                        rows.append(RSVP(user=user, event_id=event_id, status=status))
+                        changes = deltas.setdefault(event_id, {})
+                        changes[status] = changes.get(status, 0) + 1
+                        if old_status is not None:
+                            changes[old_status] = changes.get(old_status, 0) - 1
+                results.append(result)
+
+            if rows:
+                # Set-based upsert; bypasses per-row signals, so counters and
+                # cache versions are maintained here.
+                RSVP.objects.bulk_create(
+                    rows,
+                    update_conflicts=True,
+                    unique_fields=["user", "event"],
+                    update_fields=["status", "waitlisted_at"],
+                )
+                apply_rsvp_count_deltas(deltas)
+                bump_version(
+                    user_rsvps_scope(user.pk),
+                    *(event_rsvps_scope(event_id) for event_id in deltas),
+                )
+        return results
+
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
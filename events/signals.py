@@ -1,12 +1,33 @@
 # events/signals.py
-from django.db.models.signals import post_save, pre_save
+from functools import partial
+
 from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
 from django.dispatch import receiver
 from django.conf import settings
-from django.core.mail import send_mail
 from rest_framework.authtoken.models import Token
 
-from .models import Profile, Event, RSVP, Announcement, Notification
+from .authentication import token_cache
+from .avatars import schedule_processing
+from .caching import (
+    LISTING_SCOPE,
+    bump_version,
+    event_rsvps_scope,
+    user_rsvps_scope,
+)
+from .counters import adjust_rsvp_counts, apply_rsvp_count_deltas
+from .models import Profile, Event, RSVP, Announcement
+from .outbox import enqueue_notification
+from .search import get_search_backend
+from .seats import promote_waitlist
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -16,53 +37,59 @@ def create_profile_for_user(sender, instance, created, **kwargs):
         Token.objects.get_or_create(user=instance)
 
 
+# Drop cached token auth when the user, their profile or a token changes
+# (password reset, deactivation, organizer status, logout).
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, created, **kwargs):
+    if not created:
+        token_cache.invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender=Profile)
+def invalidate_cached_profile(sender, instance: Profile, created, **kwargs):
+    if not created:
+        token_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=Profile)
+def process_profile_picture(sender, instance: Profile, update_fields=None, **kwargs):
+    if update_fields is None or "profile_picture" in update_fields:
+        schedule_processing(instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance: Token, **kwargs):
+    token_cache.invalidate(instance.key)
+
+
 def _notify_rsvped(event, summary):
-    user_model = get_user_model()
-    going_user_ids = RSVP.objects.filter(event=event, status=RSVP.GOING).values_list(
-        "user_id", flat=True
-    )
-    for uid in going_user_ids:
-        profile = Profile.objects.filter(user_id=uid).first()
-        if profile and profile.notifications_opt_out:
-            continue
-        Notification.objects.create(
-            user_id=uid, event=event, summary=summary, link=""  # optional deep link
-        )
-        # Email (dev: console backend)
-        user = user_model.objects.filter(pk=uid).first()
-        if not user:
-            continue
-        send_mail(
-            subject=f"Update for {event.title}",
-            message=summary,
-            from_email=None,
-            recipient_list=[user.email] if user.email else [],
-            fail_silently=True,
-        )
+    # Fan-out happens in the process_notification_outbox worker
+    enqueue_notification(event, summary)
+
+
+# Edits to these fields notify 'going' attendees
+NOTIFY_FIELDS = [
+    "title",
+    "description",
+    "perks",
+    "start_time",
+    "end_time",
+    "address",
+    "latitude",
+    "longitude",
+    "location_name",
+]
 
 
 @receiver(pre_save, sender=Event)
 def event_changed(sender, instance: Event, **kwargs):
     if not instance.pk:
         return
-    try:
-        prev = Event.objects.get(pk=instance.pk)
-    except Event.DoesNotExist:
-        return
-    changed_fields = []
-    for fld in [
-        "title",
-        "description",
-        "perks",
-        "start_time",
-        "end_time",
-        "address",
-        "latitude",
-        "longitude",
-        "location_name",
-    ]:
-        if getattr(prev, fld) != getattr(instance, fld):
-            changed_fields.append(fld)
+    # Diff against the values the instance was loaded with; no extra SELECT
+    dirty = instance.get_dirty_fields() or []
+    changed_fields = [fld for fld in NOTIFY_FIELDS if fld in dirty]
+    instance._capacity_changed = "capacity" in dirty
+    instance._notify_after_save = None
     if changed_fields:
         summary = f"Event '{instance.title}' updated: {', '.join(changed_fields)}"
         # defer sending until after save; a simple approach:
@@ -76,6 +103,10 @@ def event_changed_post(sender, instance: Event, created, **kwargs):
     summary = getattr(instance, "_notify_after_save", None)
     if summary:
         _notify_rsvped(instance, summary)
+    if getattr(instance, "_capacity_changed", False):
+        # More seats (or no limit) fills them from the waitlist; fewer seats
+        # keeps everyone already going.
+        promote_waitlist(instance.pk)
 
 
 @receiver(post_save, sender=Announcement)
@@ -85,3 +116,87 @@ def announcement_posted(sender, instance: Announcement, created, **kwargs):
             instance.event,
             f"New announcement for '{instance.event.title}': {instance.title}",
         )
+
+
+# ---------- Search index sync ----------
+@receiver(post_migrate)
+def setup_search_index(sender, **kwargs):
+    if sender.name == "events":
+        get_search_backend().setup()
+
+
+@receiver(post_save, sender=Event)
+def index_event(sender, instance: Event, **kwargs):
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Event)
+def unindex_event(sender, instance: Event, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+# ---------- RSVP counters ----------
+@receiver(post_save, sender=RSVP)
+def rsvp_saved(sender, instance: RSVP, created, **kwargs):
+    # events.seats counts capacity-limited RSVPs as it allocates seats
+    if not getattr(instance, "_counts_applied", False):
+        old_status = None if created else getattr(instance, "_loaded_status", None)
+        adjust_rsvp_counts(instance.event_id, old_status, instance.status)
+    instance._counts_applied = False
+    instance._loaded_status = instance.status
+
+
+def deleted_with_parent(origin):
+    """Whether a delete cascades from an Event or a user.
+
+    Their RSVPs are then handled all at once: a deleted event's counters
+    and waitlist go with it, and ``release_user_rsvps`` uncounts a deleted
+    user's RSVPs in one UPDATE, instead of one per row.
+    """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Event or model is get_user_model()
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def release_user_rsvps(sender, instance, **kwargs):
+    rows = list(
+        RSVP.objects.filter(user=instance).values_list("event_id", "status", "event__capacity")
+    )
+    if not rows:
+        return
+    deltas = {}
+    for event_id, status, _capacity in rows:
+        changes = deltas.setdefault(event_id, {})
+        changes[status] = changes.get(status, 0) - 1
+    apply_rsvp_count_deltas(deltas)
+    bump_version(user_rsvps_scope(instance.pk), *(event_rsvps_scope(pk) for pk in deltas))
+    for event_id, status, capacity in rows:
+        if status == RSVP.GOING and capacity is not None:
+            transaction.on_commit(partial(promote_waitlist, event_id))
+
+
+@receiver(post_delete, sender=RSVP)
+def rsvp_deleted(sender, instance: RSVP, origin=None, **kwargs):
+    if deleted_with_parent(origin):
+        return
+    adjust_rsvp_counts(instance.event_id, instance.status, None)
+    if instance.status == RSVP.GOING:
+        # Fill the seat once committed. A no-op for unlimited events.
+        event_id = instance.event_id
+        transaction.on_commit(lambda: promote_waitlist(event_id))
+
+
+# ---------- Cache versions ----------
+# Registered last so counters and the search index are already updated.
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def event_changed_version(sender, instance: Event, **kwargs):
+    bump_version(LISTING_SCOPE)
+
+
+@receiver(post_save, sender=RSVP)
+@receiver(post_delete, sender=RSVP)
+def rsvp_changed_version(sender, instance: RSVP, origin=None, **kwargs):
+    if deleted_with_parent(origin):
+        return
+    bump_version(event_rsvps_scope(instance.event_id), user_rsvps_scope(instance.user_id))
@@ -0,0 +1,238 @@
+"""Query-budget and latency regression tests at a configurable data scale.
+
+Runs with the rest of the suite at a small scale. For realistic volumes::
+
+    PERF_SCALE=50k python manage.py test events.test_performance
+
+Query budgets must hold at every scale, so an N+1 shows up as soon as a
+page has more than one row. Latency depends on the machine, so it is only
+measured with ``PERF_LATENCY=1``: p50/p95 over ``PERF_ITERATIONS``
+requests are checked against ``perf_baseline.json`` when it has an entry
+for the current scale; ``PERF_RECORD_BASELINE=1`` rewrites that entry.
+"""
+import gc
+import json
+import os
+import random
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .counters import reconcile_rsvp_counts
+from .models import Event, Notification, Profile, RSVP
+from .search import get_search_backend
+
+
+def _scale(value):
+    value = value.strip().lower()
+    if value.endswith("k"):
+        return int(float(value[:-1]) * 1000)
+    return int(value)
+
+
+SCALE = _scale(os.environ.get("PERF_SCALE", "500"))
+ITERATIONS = int(os.environ.get("PERF_ITERATIONS", "10"))
+# Allowed slowdown over the recorded p95 before a test fails
+TOLERANCE = float(os.environ.get("PERF_TOLERANCE", "3.0"))
+RECORD_BASELINE = os.environ.get("PERF_RECORD_BASELINE") == "1"
+MEASURE_LATENCY = RECORD_BASELINE or os.environ.get("PERF_LATENCY") == "1"
+BASELINE_PATH = Path(__file__).with_name("perf_baseline.json")
+SEED_BATCH = 5000
+
+# Tables whose rows grow with the data; a plain "SCAN" of one is a full scan.
+BIG_TABLES = ("events_event", "events_rsvp", "events_notification")
+
+# (name, url, query budget). Budgets count every query the request runs,
+# starting from a cold cache; "{...}" fields are filled in from seeded rows.
+ENDPOINTS = [
+    ("events-list", "/api/events/", 2),
+    ("events-list-max-page", "/api/events/?page_size=200", 2),
+    ("events-list-next-page", "{next_page}", 2),
+    ("events-rsvp-going", "/api/events/?rsvp=going", 2),
+    ("events-mine", "/api/events/?mine=1", 2),
+    ("events-date-range", "/api/events/?date_from={now}&date_to={month}", 2),
+    ("events-calendar-range", "/api/events/?start={now}&end={month}", 2),
+    ("events-search", "/api/events/?q=workshop", 2),
+    # Every seeded description says "Free": ranking must not grow with matches squared
+    ("events-search-broad", "/api/events/?q=free", 2),
+    ("events-nearby", "/api/events/?lat=40.0&lon=-75.0&radius_km=5", 2),
+    ("events-search-nearby", "/api/events/?q=workshop&lat=40.0&lon=-75.0&radius_km=5", 2),
+    ("event-detail", "/api/events/{event}/", 1),
+    ("event-calendar", "/api/events/calendar/?rsvp=going&start={now}&end={month}", 1),
+    ("rsvps-for-event", "/api/rsvps/?event={event}", 1),
+    ("notifications-list", "/api/notifications/", 1),
+    ("notifications-unread", "/api/notifications/?unread=1", 1),
+    ("notifications-unread-count", "/api/notifications/unread_count/", 1),
+]
+
+TITLES = ["Workshop", "Pizza night", "Career fair", "Study group", "Open mic", "Hackathon"]
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def load_baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+class PerformanceRegressionTests(APITestCase):
+    # Latency per endpoint from this run, written out by PERF_RECORD_BASELINE
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        now = timezone.now()
+        n_users = max(20, SCALE // 20)
+
+        User.objects.bulk_create(
+            [User(username=f"perf{i}", email=f"perf{i}@example.com") for i in range(n_users)],
+            batch_size=SEED_BATCH,
+        )
+        users = list(User.objects.filter(username__startswith="perf").order_by("id"))
+        Profile.objects.bulk_create(
+            [Profile(user=u, is_organizer=i % 10 == 0) for i, u in enumerate(users)],
+            batch_size=SEED_BATCH,
+        )
+        cls.user = users[0]
+        organizers = users[::10]
+
+        events = []
+        for i in range(SCALE):
+            start = now + timedelta(hours=rng.randint(-24 * 90, 24 * 180))
+            events.append(
+                Event(
+                    created_by=organizers[i % len(organizers)],
+                    title=f"{TITLES[i % len(TITLES)]} {i}",
+                    description="Free snacks for everyone who shows up.",
+                    start_time=start,
+                    end_time=start + timedelta(hours=rng.randint(1, 4)),
+                    latitude=40.0 + rng.uniform(-0.5, 0.5),
+                    longitude=-75.0 + rng.uniform(-0.5, 0.5),
+                )
+            )
+        Event.objects.bulk_create(events, batch_size=SEED_BATCH)
+        event_ids = list(Event.objects.order_by("id").values_list("id", flat=True))
+        get_search_backend().rebuild(batch_size=SEED_BATCH)
+
+        statuses = [RSVP.GOING, RSVP.MAYBE, RSVP.NOT_GOING]
+        pairs = set()
+        for event_id in rng.sample(event_ids, min(len(event_ids), 60)):
+            pairs.add((cls.user.id, event_id))
+        while len(pairs) < SCALE:
+            pairs.add((rng.choice(users).id, rng.choice(event_ids)))
+        RSVP.objects.bulk_create(
+            [RSVP(user_id=u, event_id=e, status=rng.choice(statuses)) for u, e in pairs],
+            batch_size=SEED_BATCH,
+        )
+        reconcile_rsvp_counts(batch_size=SEED_BATCH)
+
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user=cls.user if i < 100 else rng.choice(users),
+                    event_id=rng.choice(event_ids),
+                    summary="Event updated",
+                    read=i % 3 == 0,
+                )
+                for i in range(max(200, SCALE // 2))
+            ],
+            batch_size=SEED_BATCH,
+        )
+        cls.event_id = event_ids[len(event_ids) // 2]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if RECORD_BASELINE and cls.results:
+            baseline = load_baseline()
+            baseline[str(SCALE)] = cls.results
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(user=self.user)
+        now = timezone.now()
+        self.params = {
+            "now": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "month": (now + timedelta(days=30)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "event": self.event_id,
+        }
+
+    def _url(self, template):
+        if template == "{next_page}":
+            return self.client.get("/api/events/").data["next"].replace("http://testserver", "")
+        return template.format(**self.params)
+
+    def _full_scans(self, queries):
+        """Big tables a request read without using an index (SQLite only)."""
+        scans = set()
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    for table in BIG_TABLES:
+                        if detail in (f"SCAN {table}", f"SCAN {table} AS {table}"):
+                            scans.add(table)
+        return scans
+
+    def test_query_budgets(self):
+        for name, template, budget in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                url = self._url(template)
+                cache.clear()
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200, url)
+                self.assertLessEqual(
+                    len(ctx.captured_queries),
+                    budget,
+                    f"{name}: {len(ctx.captured_queries)} queries, budget {budget}",
+                )
+                if connection.vendor == "sqlite":
+                    self.assertFalse(
+                        self._full_scans(ctx.captured_queries), f"{name}: full table scan"
+                    )
+
+    @skipUnless(MEASURE_LATENCY, "machine-specific; set PERF_LATENCY=1")
+    def test_latency(self):
+        baseline = load_baseline().get(str(SCALE), {})
+        for name, template, _budget in ENDPOINTS:
+            url = self._url(template)
+            samples = []
+            # Start each endpoint from a clean heap so a full collection
+            # triggered by earlier work isn't billed to whichever request
+            # happens to run when it fires.
+            gc.collect()
+            for _ in range(ITERATIONS):
+                cache.clear()  # measure the uncached path
+                started = time.perf_counter()
+                self.client.get(url)
+                samples.append((time.perf_counter() - started) * 1000)
+            p50, p95 = statistics.median(samples), percentile(samples, 0.95)
+            self.results[name] = {"p50_ms": round(p50, 2), "p95_ms": round(p95, 2)}
+            limit = baseline.get(name, {}).get("p95_ms")
+            if limit is not None and not RECORD_BASELINE:
+                with self.subTest(endpoint=name):
+                    self.assertLessEqual(
+                        p95,
+                        limit * TOLERANCE,
+                        f"{name}: p95 {p95:.1f}ms over baseline {limit}ms x{TOLERANCE}",
+                    )
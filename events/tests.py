@@ -1,12 +1,39 @@
-from datetime import timedelta
+import asyncio
+import gzip
+import io
+import json
+import pstats
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from PIL import Image
 
 from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db import OperationalError
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.authtoken.models import Token
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
 
-from .models import Event, RSVP
+from .geo import haversine_km
+from . import avatars, ics, loadgen, outbox, push, routers, seats
+from .locking import retry_on_lock
+from .caching import get_or_compute
+from .authentication import token_cache
+from .counters import reconcile_rsvp_counts
+from .importers import EventImporter, ImportFileError, ImportInterrupted
+from .models import Announcement, Event, Notification, NotificationOutbox, RSVP
 
 
 class AuthenticationTests(APITestCase):
@@ -119,3 +146,1725 @@ class RSVPTests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class EventPaginationTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.user = User.objects.create_user(
+            username="erin", password="erinpass", email="erin@example.com"
+        )
+        start = timezone.now()
+        self.events = []
+        for i in range(5):
+            # Two events share a start time to exercise the id tie-breaker.
+            self.events.append(
+                Event.objects.create(
+                    created_by=self.organizer,
+                    title=f"Event {i}",
+                    start_time=start + timedelta(hours=i // 2),
+                    end_time=start + timedelta(hours=i // 2 + 1),
+                )
+            )
+
+    def _walk(self, url):
+        ids = []
+        response = self.client.get(url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            if not response.data["next"]:
+                return ids, response
+            response = self.client.get(response.data["next"])
+
+    def test_cursor_walks_every_event_in_order(self):
+        ids, _ = self._walk("/api/events/?page_size=2")
+        self.assertEqual(ids, [e.id for e in self.events])
+
+    def test_previous_cursor_returns_preceding_page(self):
+        first = self.client.get("/api/events/?page_size=2")
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [item["id"] for item in back.data["results"]],
+            [item["id"] for item in first.data["results"]],
+        )
+
+    def test_cursor_respects_filters(self):
+        for event in self.events[1::2]:
+            RSVP.objects.create(user=self.user, event=event, status=RSVP.GOING)
+        self.client.force_authenticate(user=self.user)
+        ids, _ = self._walk("/api/events/?rsvp=going&page_size=1")
+        self.assertEqual(ids, [e.id for e in self.events[1::2]])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/events/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class EventQueryCountTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.user = User.objects.create_user(
+            username="frank", password="frankpass", email="frank@example.com"
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _create_events(self, count):
+        start = timezone.now()
+        for i in range(count):
+            event = Event.objects.create(
+                created_by=self.organizer,
+                title=f"Event {i}",
+                start_time=start + timedelta(hours=i),
+                end_time=start + timedelta(hours=i + 1),
+            )
+            RSVP.objects.create(user=self.user, event=event, status=RSVP.MAYBE)
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/events/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_does_not_grow_with_events(self):
+        self._create_events(2)
+        small, _ = self._count_list_queries()
+        self._create_events(8)
+        large, response = self._count_list_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(
+            {item["my_rsvp"] for item in response.data["results"]}, {RSVP.MAYBE}
+        )
+
+    def test_detail_resolves_my_rsvp_in_one_query(self):
+        self._create_events(1)
+        event = Event.objects.get()
+        with self.assertNumQueries(1):  # validators come from cached versions
+            response = self.client.get(f"/api/events/{event.id}/")
+        self.assertEqual(response.data["my_rsvp"], RSVP.MAYBE)
+
+
+class EventProximityTests(APITestCase):
+    CENTER = (40.7128, -74.0060)
+
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        start = timezone.now()
+        # (title, lat, lon): roughly 0, 5, 11 and 300+ km from CENTER
+        places = [
+            ("far", 42.3601, -71.0589),
+            ("mid", 40.8128, -74.0060),
+            ("near", 40.7128, -74.0060),
+            ("close", 40.7578, -74.0060),
+        ]
+        self.events = {}
+        for title, lat, lon in places:
+            self.events[title] = Event.objects.create(
+                created_by=self.organizer,
+                title=title,
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                latitude=lat,
+                longitude=lon,
+            )
+        Event.objects.create(
+            created_by=self.organizer,
+            title="nowhere",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+
+    def test_results_sorted_by_distance_within_radius(self):
+        lat, lon = self.CENTER
+        response = self.client.get(f"/api/events/?lat={lat}&lon={lon}&radius_km=25")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual([r["title"] for r in results], ["near", "close", "mid"])
+        for item in results:
+            expected = haversine_km(lat, lon, item["latitude"], item["longitude"])
+            self.assertAlmostEqual(item["distance_km"], expected, places=3)
+
+    def test_proximity_results_paginate(self):
+        lat, lon = self.CENTER
+        response = self.client.get(
+            f"/api/events/?lat={lat}&lon={lon}&radius_km=25&page_size=2"
+        )
+        titles = [r["title"] for r in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        titles += [r["title"] for r in response.data["results"]]
+        self.assertEqual(titles, ["near", "close", "mid"])
+        self.assertIsNone(response.data["next"])
+
+    def test_distance_omitted_without_location(self):
+        response = self.client.get("/api/events/")
+        self.assertNotIn("distance_km", response.data["results"][0])
+
+
+class EventSearchTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        start = timezone.now()
+
+        def make(title, **fields):
+            return Event.objects.create(
+                created_by=self.organizer,
+                title=title,
+                start_time=start,
+                end_time=start + timedelta(hours=1),
+                **fields,
+            )
+
+        self.pizza_title = make("Pizza night", description="Bring friends")
+        self.pizza_perk = make("Study group", perks="free pizza")
+        self.other = make("Chess club", description="Pizzeria trip later")
+
+    def _titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["title"] for item in response.data["results"]]
+
+    def test_results_are_ranked_by_relevance(self):
+        self.assertEqual(self._titles("/api/events/?q=pizza"), ["Pizza night", "Study group"])
+
+    def test_prefix_matching_is_optional(self):
+        self.assertEqual(self._titles("/api/events/?q=chess+clu"), [])
+        self.assertEqual(self._titles("/api/events/?q=chess+clu&prefix=1"), ["Chess club"])
+        self.assertEqual(len(self._titles("/api/events/?q=pizz&prefix=1")), 3)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.title = "Quiz night"
+        self.other.save()
+        self.assertEqual(self._titles("/api/events/?q=quiz"), ["Quiz night"])
+        self.assertEqual(self._titles("/api/events/?q=chess"), [])
+        self.pizza_title.delete()
+        self.assertEqual(self._titles("/api/events/?q=pizza"), ["Study group"])
+
+    def test_ranked_results_paginate(self):
+        response = self.client.get("/api/events/?q=pizz&prefix=1&page_size=2")
+        titles = [item["title"] for item in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        titles += [item["title"] for item in response.data["results"]]
+        self.assertEqual(sorted(titles), ["Chess club", "Pizza night", "Study group"])
+
+    def test_match_runs_once_per_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._titles("/api/events/?q=pizza")
+        listing = next(q["sql"] for q in ctx.captured_queries if "MATCH" in q["sql"])
+        self.assertEqual(listing.count("MATCH"), 1)
+
+    def test_fts_syntax_in_query_is_treated_as_text(self):
+        self.assertEqual(self._titles('/api/events/?q=pizza%22+OR+NEAR('), [])
+
+
+class NotificationOutboxTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Hackathon",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=8),
+        )
+        self.attendees = []
+        for i in range(4):
+            user = User.objects.create_user(
+                username=f"attendee{i}", password="pass", email=f"a{i}@example.com"
+            )
+            RSVP.objects.create(user=user, event=self.event, status=RSVP.GOING)
+            self.attendees.append(user)
+        opted_out = self.attendees[0].profile
+        opted_out.notifications_opt_out = True
+        opted_out.save()
+        maybe = User.objects.create_user(username="maybe", password="pass")
+        RSVP.objects.create(user=maybe, event=self.event, status=RSVP.MAYBE)
+
+    def _announce(self):
+        return Announcement.objects.create(
+            event=self.event, author=self.organizer, title="Room change", body="B12"
+        )
+
+    def test_request_path_only_enqueues(self):
+        with self.assertNumQueries(2):  # announcement + one outbox row
+            self._announce()
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_worker_fans_out_to_going_users_who_did_not_opt_out(self):
+        self._announce()
+        self.assertEqual(outbox.process_outbox(batch_size=2), (1, 0))
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)),
+            {u.id for u in self.attendees[1:]},
+        )
+        self.assertEqual(len(mail.outbox), 3)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.status, NotificationOutbox.DONE)
+        self.assertEqual(outbox.process_outbox(), (0, 0))
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        self._announce()
+        with mock.patch.object(
+            Notification.objects, "bulk_create", side_effect=RuntimeError("boom")
+        ), self.assertLogs("events.outbox", level="ERROR"):
+            self.assertEqual(outbox.process_outbox(), (0, 1))
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.status, NotificationOutbox.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertGreater(entry.available_at, timezone.now())
+        self.assertFalse(Notification.objects.exists())
+
+        NotificationOutbox.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.process_outbox(), (1, 0))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_gives_up_after_max_attempts(self):
+        self._announce()
+        with mock.patch.object(
+            outbox, "deliver", side_effect=RuntimeError("boom")
+        ), self.assertLogs("events.outbox", level="ERROR"):
+            outbox.process_outbox(max_attempts=1)
+        self.assertEqual(NotificationOutbox.objects.get().status, NotificationOutbox.FAILED)
+
+
+class RSVPCounterTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Open mic",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=2),
+        )
+        self.user = User.objects.create_user(username="gina", password="ginapass")
+
+    def _counts(self):
+        self.event.refresh_from_db()
+        return (
+            self.event.going_count,
+            self.event.maybe_count,
+            self.event.not_going_count,
+        )
+
+    def test_upsert_moves_the_counter(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.post(
+            "/api/rsvps/", {"event": self.event.id, "status": RSVP.GOING}, format="json"
+        )
+        self.assertEqual(self._counts(), (1, 0, 0))
+        self.client.post(
+            "/api/rsvps/", {"event": self.event.id, "status": RSVP.MAYBE}, format="json"
+        )
+        self.assertEqual(self._counts(), (0, 1, 0))
+        self.client.post(
+            "/api/rsvps/", {"event": self.event.id, "status": RSVP.MAYBE}, format="json"
+        )
+        self.assertEqual(self._counts(), (0, 1, 0))
+
+    def test_delete_decrements(self):
+        rsvp = RSVP.objects.create(user=self.user, event=self.event, status=RSVP.NOT_GOING)
+        self.assertEqual(self._counts(), (0, 0, 1))
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(f"/api/rsvps/{rsvp.id}/")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self._counts(), (0, 0, 0))
+
+    def _event_updates(self, queries):
+        return [q["sql"] for q in queries if q["sql"].startswith('UPDATE "events_event"')]
+
+    def test_deleting_event_skips_per_rsvp_work(self):
+        for i in range(5):
+            attendee = User.objects.create_user(username=f"fan{i}", password="fanpass")
+            RSVP.objects.create(user=attendee, event=self.event, status=RSVP.GOING)
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.event.delete()
+        self.assertEqual(self._event_updates(ctx.captured_queries), [])
+        self.assertEqual(len(callbacks), 1)  # the event's own version bump
+        self.assertFalse(RSVP.objects.exists())
+
+    def test_deleting_user_uncounts_rsvps_in_one_update(self):
+        other = Event.objects.create(
+            created_by=self.organizer,
+            title="Poetry slam",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=2),
+            capacity=1,
+        )
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.MAYBE)
+        seats.allocate_rsvp(self.user, other.id, RSVP.GOING)
+        waiting = User.objects.create_user(username="hal", password="halpass")
+        seats.allocate_rsvp(waiting, other.id, RSVP.GOING)
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.delete()
+        self.assertEqual(len(self._event_updates(ctx.captured_queries)), 2)  # + the promotion
+        self.assertEqual(self._counts(), (0, 0, 0))
+        self.assertEqual(RSVP.objects.get(user=waiting).status, RSVP.GOING)
+        other.refresh_from_db()
+        self.assertEqual((other.going_count, other.waitlisted_count), (1, 0))
+
+    def test_list_reads_counts_without_join(self):
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/events/")
+        self.assertEqual(response.data["results"][0]["going_count"], 1)
+        sql = ctx.captured_queries[-1]["sql"]
+        self.assertNotIn("GROUP BY", sql)
+        self.assertNotIn("events_rsvp", sql)
+
+    def test_reconcile_repairs_drift(self):
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        Event.objects.filter(pk=self.event.pk).update(going_count=7, maybe_count=2)
+        self.assertEqual(reconcile_rsvp_counts(dry_run=True), [self.event.pk])
+        self.assertEqual(self._counts(), (7, 2, 0))
+        self.assertEqual(reconcile_rsvp_counts(), [self.event.pk])
+        self.assertEqual(self._counts(), (1, 0, 0))
+        self.assertEqual(reconcile_rsvp_counts(), [])
+
+
+class TokenCacheTests(APITestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="adminpass", email="admin@example.com"
+        )
+        self.user = User.objects.create_user(
+            username="hank", password="hankpass", email="hank@example.com"
+        )
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_steady_state_reads_cost_no_auth_queries(self):
+        self.client.get("/api/profiles/me/")
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/profiles/me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["username"], "hank")
+        self.assertEqual(token_cache.stats()["hits"], 1)
+        self.assertEqual(token_cache.stats()["misses"], 1)
+
+    def test_logout_invalidates_cached_token(self):
+        self.client.get("/api/profiles/me/")
+        self.client.post("/api/auth/logout/")
+        response = self.client.get("/api/profiles/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_organizer_change_invalidates_cached_profile(self):
+        response = self.client.get("/api/profiles/me/")
+        self.assertFalse(response.data["is_organizer"])
+        admin_client = self.client_class()
+        admin_client.force_authenticate(user=self.admin)
+        admin_client.post(
+            f"/api/profiles/{self.user.id}/organizer/", {"is_organizer": True}, format="json"
+        )
+        response = self.client.get("/api/profiles/me/")
+        self.assertTrue(response.data["is_organizer"])
+
+    def test_deactivation_invalidates_cached_user(self):
+        self.client.get("/api/profiles/me/")
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get("/api/profiles/me/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class EventConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Career fair",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        self.user = User.objects.create_user(username="ivy", password="ivypass")
+        self.client.force_authenticate(user=self.user)
+
+    def _revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_list_returns_304_without_serializing(self):
+        first = self.client.get("/api/events/")
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn("Last-Modified", first)
+        with self.assertNumQueries(0):
+            second = self._revalidate("/api/events/", first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_per_user_list_revalidates_with_one_query(self):
+        first = self.client.get("/api/events/?rsvp=going")
+        with self.assertNumQueries(1):
+            second = self._revalidate("/api/events/?rsvp=going", first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_unfiltered_per_user_params_use_the_shared_listing(self):
+        self.client.force_authenticate(user=None)
+        self.client.get("/api/events/?mine=1")
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/events/?mine=1")
+        self.assertEqual(len(response.data["results"]), 1)
+        # Only the counter overlay for the page; no id scan of every event
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('"events_event"."id" IN', ctx.captured_queries[0]["sql"])
+
+    def test_detail_supports_conditional_get(self):
+        url = f"/api/events/{self.event.id}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._revalidate(url, first["ETag"]).status_code, 304)
+        self.event.title = "Career fair 2"
+        self.event.save()
+        self.assertEqual(self._revalidate(url, first["ETag"]).status_code, 200)
+
+    def test_rsvp_change_invalidates_validator(self):
+        first = self.client.get("/api/events/")
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        second = self._revalidate("/api/events/", first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["results"][0]["my_rsvp"], RSVP.GOING)
+
+    def test_rsvp_to_another_event_keeps_validators(self):
+        other = Event.objects.create(
+            created_by=self.organizer,
+            title="Job talk",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+        )
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        detail = f"/api/events/{self.event.id}/"
+        going = "/api/events/?rsvp=going"
+        first_detail, first_going = self.client.get(detail), self.client.get(going)
+        RSVP.objects.create(user=self.organizer, event=other, status=RSVP.GOING)
+        self.assertEqual(self._revalidate(detail, first_detail["ETag"]).status_code, 304)
+        self.assertEqual(self._revalidate(going, first_going["ETag"]).status_code, 304)
+        RSVP.objects.create(user=self.organizer, event=self.event, status=RSVP.MAYBE)
+        second = self._revalidate(going, first_going["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["results"][0]["maybe_count"], 1)
+
+    def test_validator_is_per_user(self):
+        first = self.client.get("/api/events/")
+        self.client.force_authenticate(user=self.organizer)
+        other = self._revalidate("/api/events/", first["ETag"])
+        self.assertEqual(other.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(other["ETag"], first["ETag"])
+        self.assertIn("Cookie", other["Vary"])
+
+    def test_deleted_event_invalidates_validator(self):
+        first = self.client.get("/api/events/")
+        Event.objects.create(
+            created_by=self.organizer,
+            title="Second",
+            start_time=timezone.now(),
+            end_time=timezone.now(),
+        ).delete()
+        self.assertEqual(self._revalidate("/api/events/", first["ETag"]).status_code, 200)
+
+
+class EventListingCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Board games",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        self.user = User.objects.create_user(username="jack", password="jackpass")
+
+    def test_repeated_anonymous_listing_is_served_from_cache(self):
+        self.client.get("/api/events/?page_size=10")
+        # Only the counters are read: one query for the page's events
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/events/?page_size=10")
+        self.assertEqual(response.data["results"][0]["title"], "Board games")
+
+    def test_event_change_invalidates(self):
+        self.client.get("/api/events/")
+        self.event.title = "Board games night"
+        self.event.save()
+        response = self.client.get("/api/events/")
+        self.assertEqual(response.data["results"][0]["title"], "Board games night")
+
+    def test_rsvp_updates_counts_without_rebuilding(self):
+        first = self.client.get("/api/events/")
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["going_count"], 1)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_rsvp_elsewhere_keeps_validator(self):
+        other = Event.objects.create(
+            created_by=self.organizer,
+            title="Chess club",
+            start_time=timezone.now() + timedelta(days=1),
+            end_time=timezone.now() + timedelta(days=1, hours=2),
+        )
+        first = self.client.get("/api/events/?page_size=1")
+        self.assertEqual([item["id"] for item in first.data["results"]], [self.event.id])
+        RSVP.objects.create(user=self.user, event=other, status=RSVP.GOING)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/events/?page_size=1", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_listing_gets_per_user_rsvp(self):
+        self.client.get("/api/events/")
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.MAYBE)
+        self.client.get("/api/events/")
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/events/")
+        self.assertEqual(response.data["results"][0]["my_rsvp"], RSVP.MAYBE)
+        self.client.force_authenticate(user=None)
+        response = self.client.get("/api/events/")
+        self.assertIsNone(response.data["results"][0]["my_rsvp"])
+
+    def test_concurrent_rebuild_serves_stale_value(self):
+        cache.set("k", (1.0, "old"))
+        cache.add("k:lock", 1)
+        compute = mock.Mock(return_value="new")
+        self.assertEqual(get_or_compute("k", 2.0, compute), (1.0, "old"))
+        compute.assert_not_called()
+        cache.delete("k:lock")
+        self.assertEqual(get_or_compute("k", 2.0, compute), (2.0, "new"))
+        self.assertEqual(get_or_compute("k", 2.0, compute), (2.0, "new"))
+        compute.assert_called_once()
+
+
+class EventChangeTrackingTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.organizer.profile.is_organizer = True
+        self.organizer.profile.save()
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Robotics demo",
+            description="Bots",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+        )
+
+    def test_save_writes_only_changed_columns_without_select(self):
+        event = Event.objects.get(pk=self.event.pk)
+        event.title = "Robotics showcase"
+        with CaptureQueriesContext(connection) as ctx:
+            event.save()
+        statements = [q["sql"] for q in ctx.captured_queries]
+        self.assertFalse(
+            [sql for sql in statements if sql.startswith("SELECT") and 'FROM "events_event"' in sql]
+        )
+        update = next(sql for sql in statements if sql.startswith("UPDATE \"events_event\""))
+        self.assertIn('"title"', update)
+        self.assertNotIn('"description"', update)
+        self.assertNotIn('"going_count"', update)
+
+    def test_unchanged_save_is_skipped(self):
+        event = Event.objects.get(pk=self.event.pk)
+        with self.assertNumQueries(0):
+            event.save()
+
+    def test_stale_instance_does_not_clobber_counters(self):
+        event = Event.objects.get(pk=self.event.pk)
+        attendee = User.objects.create_user(username="kim", password="kimpass")
+        RSVP.objects.create(user=attendee, event=self.event, status=RSVP.GOING)
+        event.perks = "stickers"
+        event.save()
+        event.refresh_from_db()
+        self.assertEqual(event.going_count, 1)
+
+    def test_refresh_resets_the_baseline(self):
+        event = Event.objects.get(pk=self.event.pk)
+        Event.objects.filter(pk=event.pk).update(title="Renamed elsewhere")
+        attendee = User.objects.create_user(username="lee", password="leepass")
+        RSVP.objects.create(user=attendee, event=self.event, status=RSVP.GOING)
+        event.refresh_from_db()
+        event.perks = "stickers"
+        with CaptureQueriesContext(connection) as ctx:
+            event.save()
+        update = next(q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE"))
+        self.assertNotIn('"title"', update)
+        self.assertNotIn('"going_count"', update)
+        self.assertEqual(
+            NotificationOutbox.objects.get().summary, "Event 'Renamed elsewhere' updated: perks"
+        )
+
+    def test_api_update_notifies_from_in_memory_diff(self):
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.patch(
+            f"/api/events/{self.event.id}/", {"title": "Robotics expo"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.summary, "Event 'Robotics expo' updated: title")
+        self.client.patch(
+            f"/api/events/{self.event.id}/", {"title": "Robotics expo"}, format="json"
+        )
+        self.assertEqual(NotificationOutbox.objects.count(), 1)
+
+
+class RSVPBulkTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        start = timezone.now()
+        self.events = [
+            Event.objects.create(
+                created_by=self.organizer,
+                title=f"Club meeting {i}",
+                start_time=start + timedelta(days=i),
+                end_time=start + timedelta(days=i, hours=1),
+            )
+            for i in range(3)
+        ]
+        self.user = User.objects.create_user(username="lee", password="leepass")
+        RSVP.objects.create(user=self.user, event=self.events[0], status=RSVP.MAYBE)
+        RSVP.objects.create(user=self.user, event=self.events[1], status=RSVP.GOING)
+        self.client.force_authenticate(user=self.user)
+
+    def _post(self, items):
+        return self.client.post("/api/rsvps/bulk/", {"rsvps": items}, format="json")
+
+    def test_bulk_upsert_reports_each_item(self):
+        items = [
+            {"event": self.events[0].id, "status": RSVP.GOING},
+            {"event": self.events[1].id, "status": RSVP.GOING},
+            {"event": self.events[2].id, "status": RSVP.NOT_GOING},
+            {"event": 999999, "status": RSVP.GOING},
+            {"event": self.events[2].id, "status": RSVP.GOING},
+        ]
+        response = self._post(items)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r["result"] for r in response.data["results"]],
+            ["updated", "unchanged", "created", "error", "error"],
+        )
+        self.assertEqual(
+            dict(RSVP.objects.filter(user=self.user).values_list("event_id", "status")),
+            {
+                self.events[0].id: RSVP.GOING,
+                self.events[1].id: RSVP.GOING,
+                self.events[2].id: RSVP.NOT_GOING,
+            },
+        )
+
+    def test_counters_follow_bulk_upsert(self):
+        self._post(
+            [
+                {"event": self.events[0].id, "status": RSVP.GOING},
+                {"event": self.events[1].id, "status": RSVP.NOT_GOING},
+            ]
+        )
+        counts = {
+            e.pk: (e.going_count, e.maybe_count, e.not_going_count)
+            for e in Event.objects.all()
+        }
+        self.assertEqual(counts[self.events[0].id], (1, 0, 0))
+        self.assertEqual(counts[self.events[1].id], (0, 0, 1))
+        self.assertEqual(reconcile_rsvp_counts(), [])
+
+    def test_query_count_is_constant(self):
+        items = [{"event": e.id, "status": RSVP.NOT_GOING} for e in self.events]
+        # validate + upsert + counters, plus the savepoint pair
+        with self.assertNumQueries(5):
+            self._post(items)
+
+    def test_invalid_status_rejects_request(self):
+        response = self._post([{"event": self.events[0].id, "status": "bogus"}])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class EventImportTests(APITestCase):
+    CSV = (
+        "title,start_time,end_time,address,latitude,longitude\n"
+        "Welcome week,2030-09-01T10:00:00Z,2030-09-01T12:00:00Z,1 Main St,,\n"
+        "Bad row,not-a-date,2030-09-01T12:00:00Z,,,\n"
+        "Stargazing,2030-09-02T21:00:00Z,2030-09-02T23:00:00Z,,40.5,-74.25\n"
+    )
+
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.organizer.profile.is_organizer = True
+        self.organizer.profile.save()
+        self.client.force_authenticate(user=self.organizer)
+
+    def _upload(self, content, name="events.csv", **extra):
+        return self.client.post(
+            "/api/events/import/",
+            {"file": SimpleUploadedFile(name, content.encode()), **extra},
+            format="multipart",
+        )
+
+    def test_non_utf8_file_is_rejected_without_importing(self):
+        content = self.CSV.encode() + "Caf\u00e9 night,2030-09-03T10:00:00Z,2030-09-03T11:00:00Z,,,\n".encode("latin-1")
+        response = self.client.post(
+            "/api/events/import/",
+            {"file": SimpleUploadedFile("events.csv", content)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("UTF-8", response.data["file"][0])
+        self.assertFalse(Event.objects.exists())
+
+    def _late_bad_byte(self):
+        return "\n".join(
+            [self.CSV.strip()] + ["x" * 9000, "Late,2030-09-03T10:00:00Z,2030-09-03T11:00:00Z,,,\xff"]
+        ).encode("latin-1")
+
+    def test_unreadable_file_is_rejected_before_any_chunk_commits(self):
+        importer = EventImporter(self.organizer, chunk_size=1)
+        with self.assertRaises(ImportFileError):
+            importer.run(io.BytesIO(self._late_bad_byte()), "csv")
+        self.assertFalse(Event.objects.exists())
+
+    def test_interrupted_import_keeps_and_reports_committed_chunks(self):
+        class Unseekable(io.BytesIO):
+            def seekable(self):
+                return False
+
+        importer = EventImporter(self.organizer, chunk_size=1)
+        with self.assertRaises(ImportInterrupted) as caught:
+            importer.run(Unseekable(self._late_bad_byte()), "csv")
+        self.assertEqual(caught.exception.report["created"], 2)
+        self.assertIn("stopped after line 4", str(caught.exception))
+        self.assertEqual(Event.objects.count(), 2)
+
+    def test_management_command_rejects_non_utf8_file(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".csv") as handle:
+            handle.write("title\nCaf\u00e9 night\n".encode("latin-1"))
+            handle.flush()
+            with self.assertRaisesMessage(CommandError, "UTF-8"):
+                call_command("import_events", handle.name, organizer="organizer")
+        self.assertFalse(Event.objects.exists())
+
+    def test_nul_byte_is_a_row_error(self):
+        response = self._upload(self.CSV + "Nul\0row,2030-09-03T10:00:00Z,2030-09-03T11:00:00Z,,,\n")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        # Python < 3.11's csv raises on NUL; newer versions leave it to validation
+        self.assertIn(5, [e["line"] for e in response.data["errors"]])
+
+    def test_csv_import_creates_events_and_reports_row_errors(self):
+        response = self._upload(self.CSV)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            (response.data["total"], response.data["created"], response.data["failed"]),
+            (3, 2, 1),
+        )
+        self.assertEqual(response.data["errors"][0]["line"], 3)
+        self.assertIn("start_time", response.data["errors"][0]["errors"])
+        welcome = Event.objects.get(title="Welcome week")
+        self.assertEqual(welcome.created_by, self.organizer)
+        self.assertEqual(welcome.map_link, "https://maps.google.com/?q=1+Main+St")
+        self.assertEqual(
+            Event.objects.get(title="Stargazing").map_link,
+            "https://maps.google.com/?q=40.5,-74.25",
+        )
+        # Imported rows are searchable straight away
+        search = self.client.get("/api/events/?q=stargazing")
+        self.assertEqual(len(search.data["results"]), 1)
+
+    def test_dry_run_writes_nothing(self):
+        response = self._upload(self.CSV, dry_run="true")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["created"], 2)
+        self.assertFalse(Event.objects.exists())
+
+    def test_non_organizer_cannot_import(self):
+        self.client.force_authenticate(
+            user=User.objects.create_user(username="mia", password="miapass")
+        )
+        self.assertEqual(self._upload(self.CSV).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_management_command_streams_ndjson_in_chunks(self):
+        lines = [
+            '{"title": "Talk %d", "start_time": "2030-10-01T10:00:00Z", '
+            '"end_time": "2030-10-01T11:00:00Z"}' % i
+            for i in range(5)
+        ]
+        lines.insert(2, "{broken")
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson") as handle:
+            handle.write("\n".join(lines))
+            handle.flush()
+            call_command(
+                "import_events",
+                handle.name,
+                organizer="organizer",
+                chunk_size=2,
+                stdout=mock.Mock(),
+                stderr=mock.Mock(),
+            )
+        self.assertEqual(Event.objects.count(), 5)
+
+
+class AttendeeExportTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(
+            username="organizer", password="organizerpass", email="org@example.com"
+        )
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Game night",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=2),
+        )
+        self.attendees = []
+        for i, rsvp_status in enumerate([RSVP.GOING, RSVP.MAYBE, RSVP.GOING]):
+            user = User.objects.create_user(
+                username=f"guest{i}", password="pass", email=f"g{i}@example.com"
+            )
+            RSVP.objects.create(user=user, event=self.event, status=rsvp_status)
+            self.attendees.append(user)
+        self.url = f"/api/events/{self.event.id}/attendees/"
+
+    def _body(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_organizer_streams_csv(self):
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment;", response["Content-Disposition"])
+        lines = self._body(response).splitlines()
+        self.assertEqual(lines[0], "user_id,username,email,first_name,last_name,status,rsvp_at")
+        self.assertEqual([line.split(",")[1] for line in lines[1:]], ["guest0", "guest1", "guest2"])
+
+    def test_ndjson_with_status_filter(self):
+        self.client.force_authenticate(user=self.organizer)
+        response = self.client.get(self.url + "?file_format=ndjson&status=going")
+        rows = [json.loads(line) for line in self._body(response).splitlines()]
+        self.assertEqual([row["username"] for row in rows], ["guest0", "guest2"])
+        self.assertEqual(rows[0]["email"], "g0@example.com")
+
+    def test_only_organizer_can_export(self):
+        self.client.force_authenticate(user=self.attendees[0])
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CalendarRangeTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="organizer", password="organizerpass")
+        self.user = User.objects.create_user(username="jo", password="jopass")
+        base = timezone.make_aware(datetime(2030, 3, 1, 12, 0))
+
+        def make(title, start_days, hours=2):
+            start = base + timedelta(days=start_days)
+            return Event.objects.create(
+                created_by=self.organizer,
+                title=title,
+                description="long description " * 20,
+                start_time=start,
+                end_time=start + timedelta(hours=hours),
+            )
+
+        self.before = make("February", -10)
+        self.spanning = make("Overnight", -1, hours=48)  # starts before, ends inside
+        self.inside = make("March", 10)
+        self.after = make("April", 40)
+        for event in (self.spanning, self.inside, self.after):
+            RSVP.objects.create(user=self.user, event=event, status=RSVP.GOING)
+        self.client.force_authenticate(user=self.user)
+        self.range = "start=2030-03-01T00:00:00Z&end=2030-04-01T00:00:00Z"
+
+    def test_list_filters_by_interval_overlap(self):
+        response = self.client.get(f"/api/events/?{self.range}")
+        titles = [e["title"] for e in response.data["results"]]
+        self.assertEqual(titles, ["Overnight", "March"])
+
+    def test_calendar_returns_slim_payload_for_range(self):
+        response = self.client.get(f"/api/events/calendar/?rsvp=going&{self.range}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([e["id"] for e in response.data], [self.spanning.id, self.inside.id])
+        self.assertEqual(set(response.data[0]), {"id", "title", "start", "end"})
+
+    def test_calendar_accepts_bare_dates(self):
+        response = self.client.get("/api/events/calendar/?start=2030-03-01&end=2030-04-01")
+        self.assertEqual([e["title"] for e in response.data], ["Overnight", "March"])
+
+    def test_calendar_requires_range(self):
+        response = self.client.get("/api/events/calendar/?start=2030-03-01")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("end", response.data)
+
+    def test_calendar_range_is_cacheable_per_user(self):
+        url = f"/api/events/calendar/?rsvp=going&{self.range}"
+        first = self.client.get(url)
+        self.assertIn("max-age=60", first["Cache-Control"])
+        self.assertIn("private", first["Cache-Control"])
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+        RSVP.objects.filter(user=self.user, event=self.inside).delete()
+        third = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual([e["id"] for e in third.data], [self.spanning.id])
+
+
+class CalendarFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user(username="organizer", password="organizerpass")
+        self.user = User.objects.create_user(username="kai", password="kaipass")
+        start = timezone.now() + timedelta(days=2)
+        self.going = Event.objects.create(
+            created_by=self.organizer,
+            title="Pizza, talks; and more",
+            description="Line one\nline two " + "x" * 100,
+            start_time=start,
+            end_time=start + timedelta(hours=2),
+            location_name="Hall B",
+        )
+        self.maybe = Event.objects.create(
+            created_by=self.organizer,
+            title="Maybe event",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+        )
+        RSVP.objects.create(user=self.user, event=self.going, status=RSVP.GOING)
+        RSVP.objects.create(user=self.user, event=self.maybe, status=RSVP.MAYBE)
+        self.client.force_authenticate(user=self.user)
+        link = self.client.post("/api/profiles/me/calendar-feed/").data["url"]
+        self.client.force_authenticate(user=None)
+        self.path = link.split("testserver", 1)[1]
+
+    def test_feed_contains_only_going_events(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/calendar"))
+        body = response.content.decode()
+        self.assertIn(f"UID:event-{self.going.id}@campusbites", body)
+        self.assertIn("SUMMARY:Pizza\\, talks\\; and more", body)
+        self.assertNotIn("Maybe event", body)
+        self.assertTrue(all(len(line.encode()) <= 75 for line in body.split("\r\n")))
+
+    def test_unchanged_feed_revalidates_with_one_query(self):
+        first = self.client.get(self.path)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.path, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_rsvp_and_event_changes_invalidate_feed(self):
+        first = self.client.get(self.path)
+        rsvp = RSVP.objects.get(user=self.user, event=self.maybe)
+        rsvp.status = RSVP.GOING
+        rsvp.save()
+        second = self.client.get(self.path, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertIn("Maybe event", second.content.decode())
+
+        self.going.title = "Renamed"
+        self.going.save()
+        third = self.client.get(self.path, HTTP_IF_NONE_MATCH=second["ETag"])
+        self.assertIn("SUMMARY:Renamed", third.content.decode())
+
+    def test_only_changed_events_are_rerendered(self):
+        self.client.get(self.path)
+        self.going.title = "Renamed"
+        self.going.save()
+        with mock.patch("events.ics.render_vevent", wraps=ics.render_vevent) as render:
+            self.client.get(self.path)
+        self.assertEqual([c.args[0].pk for c in render.call_args_list], [self.going.pk])
+
+    def test_get_reads_link_without_creating_one(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get("/api/profiles/me/calendar-feed/")
+        self.assertEqual(response.data["url"], f"http://testserver{self.path}")
+
+        self.client.force_authenticate(user=self.organizer)
+        self.assertIsNone(self.client.get("/api/profiles/me/calendar-feed/").data["url"])
+        self.organizer.profile.refresh_from_db()
+        self.assertIsNone(self.organizer.profile.calendar_token)
+
+    def test_rotating_token_revokes_old_link(self):
+        self.client.force_authenticate(user=self.user)
+        new_link = self.client.post("/api/profiles/me/calendar-feed/").data["url"]
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.path).status_code, status.HTTP_404_NOT_FOUND)
+        new_path = new_link.split("testserver", 1)[1]
+        self.assertEqual(self.client.get(new_path).status_code, status.HTTP_200_OK)
+
+
+class NotificationInboxTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.organizer = User.objects.create_user(username="organizer", password="organizerpass")
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Game night",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=3),
+        )
+        self.user = User.objects.create_user(username="lee", password="leepass")
+        self.other = User.objects.create_user(username="max", password="maxpass")
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        for user in (self.user, self.user, self.other):
+            Notification.objects.create(user=user, event=self.event, summary="Update")
+        self.client.force_authenticate(user=self.user)
+
+    def test_unread_count_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 2)
+
+    def test_mark_read_updates_only_read_and_refreshes_count(self):
+        self.client.get("/api/notifications/unread_count/")
+        notif = Notification.objects.filter(user=self.user).first()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f"/api/notifications/{notif.id}/mark_read/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        update = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+        self.assertEqual(len(update), 1)
+        self.assertNotIn("summary", update[0])
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 1)
+
+    def test_mark_all_read_is_one_update_scoped_to_user(self):
+        self.client.get("/api/notifications/unread_count/")
+        with self.assertNumQueries(1):
+            response = self.client.post("/api/notifications/mark_all_read/")
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 0)
+        self.assertTrue(Notification.objects.filter(user=self.other, read=False).exists())
+
+    def test_unread_filter(self):
+        Notification.objects.filter(user=self.user).update(read=True)
+        Notification.objects.create(user=self.user, event=self.event, summary="New")
+        response = self.client.get("/api/notifications/?unread=1")
+        self.assertEqual([n["summary"] for n in response.data], ["New"])
+
+    def test_outbox_delivery_refreshes_count(self):
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 2)
+        Announcement.objects.create(event=self.event, author=self.organizer, title="Hi", body="")
+        outbox.process_outbox()
+        self.assertEqual(self.client.get("/api/notifications/unread_count/").data["unread"], 3)
+
+
+class NotificationPushTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="organizer", password="organizerpass")
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Open mic",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=2),
+        )
+        self.user = User.objects.create_user(username="ren", password="renpass")
+        RSVP.objects.create(user=self.user, event=self.event, status=RSVP.GOING)
+        self.async_client.cookies["auth_token"] = Token.objects.get(user=self.user).key
+
+    def _announce_and_deliver(self):
+        Announcement.objects.create(event=self.event, author=self.organizer, title="Moved", body="")
+        with self.captureOnCommitCallbacks(execute=True):
+            outbox.process_outbox()
+
+    async def test_stream_pushes_delivered_notifications(self):
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b"retry: 5000\n\n")
+        await sync_to_async(self._announce_and_deliver)()
+        frame = (await asyncio.wait_for(anext(chunks), 5)).decode()
+        notif = await Notification.objects.aget(user=self.user)
+        self.assertTrue(frame.startswith(f"id: {notif.id}\nevent: notification\n"))
+        self.assertEqual(json.loads(frame.split("data: ", 1)[1])["summary"], notif.summary)
+        await chunks.aclose()
+
+    def test_pages_only_subscribe_when_streaming_is_available(self):
+        # Test client requests are WSGI: the stream would only answer 501
+        with override_settings(PUSH_BROKER_ADDRESS="127.0.0.1:1"):
+            response = self.client.get("/login/")
+        self.assertContains(response, 'data-notification-stream=""')
+
+    async def test_asgi_with_broker_enables_subscription(self):
+        response = await self.async_client.get("/login/")
+        self.assertContains(response, 'data-notification-stream=""')
+        with override_settings(PUSH_BROKER_ADDRESS="127.0.0.1:1"):
+            response = await self.async_client.get("/login/")
+        self.assertContains(response, 'data-notification-stream="true"')
+
+    async def test_reconnect_replays_missed_notifications(self):
+        await sync_to_async(self._announce_and_deliver)()
+        response = await self.async_client.get(
+            "/api/notifications/stream/", headers={"Last-Event-ID": "0"}
+        )
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+        self.assertIn(b"event: notification", await anext(chunks))
+        await chunks.aclose()
+
+    async def test_stream_requires_authentication(self):
+        self.async_client.cookies.clear()
+        response = await self.async_client.get("/api/notifications/stream/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_asgi_only(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get("/api/notifications/stream/").status_code, 501)
+
+    async def test_slow_client_is_told_to_resync(self):
+        queue = push.hub.subscribe(1)
+        try:
+            for i in range(push.QUEUE_SIZE + 1):
+                push.hub.publish(1, {"id": i})
+            await asyncio.sleep(0)
+            self.assertIs(await queue.get(), push.RESYNC)
+        finally:
+            push.hub.unsubscribe(1, queue)
+
+    async def test_broker_relays_between_processes(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(
+            PUSH_BROKER_ADDRESS=f"unix:{tmp}/push.sock"
+        ):
+            broker = asyncio.create_task(push.serve_broker(f"unix:{tmp}/push.sock"))
+            queue = push.hub.subscribe(42)
+            try:
+                push.ensure_listener()
+                message = None
+                for _ in range(50):  # until the listener has subscribed
+                    await asyncio.to_thread(push.publish, [(42, {"id": 1})])
+                    try:
+                        message = await asyncio.wait_for(queue.get(), 0.1)
+                        break
+                    except asyncio.TimeoutError:
+                        continue
+                self.assertEqual(message, {"id": 1})
+            finally:
+                push.hub.unsubscribe(42, queue)
+                # Listener first, so the broker sees it disconnect cleanly
+                for task in [*push._listeners.values(), broker]:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    await asyncio.sleep(0.05)
+                push._listeners.clear()
+
+
+class LoadToolingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.counts = loadgen.seed_campus(
+            users=12, organizers=2, events=30, rsvps_per_user=3, announcements=5
+        )
+
+    def test_seed_campus_builds_consistent_dataset(self):
+        self.assertEqual(self.counts, {"users": 12, "events": 30, "rsvps": 36, "announcements": 5})
+        self.assertEqual(Token.objects.filter(user__username__startswith="campus0_").count(), 12)
+        event = Event.objects.filter(rsvps__isnull=False).first()
+        self.assertEqual(event.going_count, event.rsvps.filter(status=RSVP.GOING).count())
+        self.assertIsNotNone(event.latitude)
+
+    def test_synthetic_mix_runs_through_wsgi_app(self):
+        requests = loadgen.synthetic_requests(40, seed=1)
+        results, wall = loadgen.run_load(requests, threads=1)
+        report = loadgen.summarize(results, wall)
+        self.assertEqual(sum(row["requests"] for row in report.values()), 40)
+        for name, row in report.items():
+            self.assertEqual(row["error_rate"], 0, name)
+            self.assertEqual(sum(row["histogram"]), row["requests"])
+
+    def test_rsvp_burst_targets_few_events(self):
+        requests = loadgen.synthetic_requests(60, mix=loadgen.RSVP_BURST_MIX, seed=2)
+        events = {r["body"]["event"] for r in requests if r["method"] == "POST"}
+        self.assertLessEqual(len(events), loadgen.HOT_EVENTS)
+        results, _wall = loadgen.run_load(requests)
+        self.assertEqual({status for name, status, _ms in results if name == "rsvp"}, {201})
+
+    def test_replays_jsonl_log(self):
+        event = Event.objects.first()
+        lines = [
+            {"path": f"/api/events/{event.id}/"},
+            {
+                "method": "POST",
+                "path": "/api/rsvps/",
+                "user": "campus0_3",
+                "body": {"event": event.id, "status": "going"},
+            },
+            {"path": "/api/notifications/unread_count/"},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/requests.jsonl"
+            with open(path, "w") as log:
+                log.write("\n".join(json.dumps(line) for line in lines))
+            requests = loadgen.load_log(path)
+        self.assertEqual(requests[0]["name"], "GET /api/events/{id}/")
+        statuses = [status for _name, status, _ms in loadgen.run_load(requests)[0]]
+        self.assertEqual(statuses, [200, 201, 401])
+        self.assertTrue(RSVP.objects.filter(user__username="campus0_3", event=event).exists())
+
+
+class ProfilingMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.dump_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dump_dir, ignore_errors=True)
+        self.user = User.objects.create_user(username="pat", password="patpass")
+        Event.objects.create(
+            created_by=self.user,
+            title="Profiled",
+            start_time=timezone.now(),
+            end_time=timezone.now() + timedelta(hours=1),
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def _settings(self, **extra):
+        return override_settings(
+            REQUEST_PROFILING=True,
+            REQUEST_PROFILING_DIR=self.dump_dir,
+            REQUEST_PROFILING_SECRET="let-me-profile",
+            **extra,
+        )
+
+    def test_disabled_middleware_adds_nothing(self):
+        response = self.client.get("/api/events/?rsvp=going")
+        self.assertNotIn("Server-Timing", response)
+
+    def test_server_timing_and_log_line(self):
+        with self._settings(), self.assertLogs("events.profiling", "INFO") as logs:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get("/api/events/?rsvp=going")
+        timing = response["Server-Timing"]
+        for phase in ("db;", "view;", "serialize;", "signals;", "total;"):
+            self.assertIn(phase, timing)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], "/api/events/")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["db_queries"], len(ctx.captured_queries))
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', timing)
+        self.assertGreater(record["serialize_ms"], 0)
+        self.assertGreaterEqual(record["total_ms"], record["view_ms"])
+        self.assertIsNone(record["profile"])
+
+    def test_header_with_secret_writes_cprofile_dump(self):
+        with self._settings(), self.assertLogs("events.profiling", "INFO") as logs:
+            self.client.get("/api/events/?rsvp=going", HTTP_X_PROFILE="wrong")
+            self.client.get("/api/events/?rsvp=going", HTTP_X_PROFILE="let-me-profile")
+        records = [json.loads(r.getMessage()) for r in logs.records]
+        self.assertIsNone(records[0]["profile"])
+        dump = records[1]["profile"]
+        self.assertTrue(dump.startswith(self.dump_dir) and dump.endswith(".prof"))
+        self.assertGreater(pstats.Stats(dump).total_calls, 0)
+
+    def test_sampling_rate(self):
+        with self._settings(REQUEST_PROFILING_SAMPLE_RATE=1.0), self.assertLogs(
+            "events.profiling", "INFO"
+        ) as logs:
+            self.client.get("/api/events/?rsvp=going")
+        self.assertIsNotNone(json.loads(logs.records[-1].getMessage())["profile"])
+
+
+class StaticAssetTests(APITestCase):
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root, ignore_errors=True)
+        self.overrides = override_settings(
+            STATIC_ROOT=self.static_root,
+            STORAGES={
+                "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+                "staticfiles": {"BACKEND": "events.storage.CompressedManifestStaticFilesStorage"},
+            },
+        )
+        self.overrides.enable()
+        self.addCleanup(self.overrides.disable)
+        call_command("collectstatic", interactive=False, verbosity=0)
+        manifest = json.loads(Path(self.static_root, "staticfiles.json").read_text())
+        self.app_js = manifest["paths"]["app.js"]
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        self.assertRegex(self.app_js, r"^app\.[0-9a-f]{12}\.js$")
+        original = Path(self.static_root, self.app_js).read_bytes()
+        compressed = Path(self.static_root, self.app_js + ".gz").read_bytes()
+        self.assertEqual(gzip.decompress(compressed), original)
+        self.assertLess(len(compressed), len(original))
+        # Already-compressed images get no variants
+        self.assertFalse(Path(self.static_root, "images", "default-avatar.png.gz").exists())
+
+    def test_templates_link_hashed_names(self):
+        response = self.client.get("/login/")
+        self.assertContains(response, f"/static/{self.app_js}")
+
+    def test_serves_precompressed_variant_as_immutable(self):
+        response = self.client.get(f"/static/{self.app_js}", HTTP_ACCEPT_ENCODING="gzip, br;q=0")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("javascript", response["Content-Type"])
+        self.assertIn("immutable", response["Cache-Control"])
+        self.assertIn("Accept-Encoding", response["Vary"])
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(body, Path(self.static_root, self.app_js).read_bytes())
+
+        again = self.client.get(
+            f"/static/{self.app_js}",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_identity_and_unhashed_requests(self):
+        response = self.client.get(f"/static/{self.app_js}")
+        self.assertNotIn("Content-Encoding", response)
+        unhashed = self.client.get("/static/app.js", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(unhashed["Cache-Control"], "public, max-age=0, must-revalidate")
+        self.assertEqual(self.client.get("/static/../manage.py").status_code, 404)
+
+
+class AvatarPipelineTests(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, AVATAR_PROCESSING="inline")
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create_user(username="pic", password="pw")
+        self.client.force_authenticate(user=self.user)
+
+    def _upload(self, size=(600, 400)):
+        image = Image.new("RGB", size, (200, 30, 30))
+        exif = Image.Exif()
+        exif[0x010F] = "SecretCam"  # Make
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", exif=exif.tobytes())
+        upload = SimpleUploadedFile("me.jpg", buffer.getvalue(), content_type="image/jpeg")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                "/api/profiles/me/", {"profile_picture": upload}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.user.profile.refresh_from_db()
+        return self.user.profile
+
+    def _open(self, name):
+        return Image.open(Path(self.media_root, name))
+
+    def test_upload_is_resized_stripped_and_content_addressed(self):
+        profile = self._upload()
+        self.assertRegex(profile.profile_picture.name, r"^avatars/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(sorted(profile.profile_picture_variants, key=int), ["32", "64", "256"])
+        for size, formats in profile.profile_picture_variants.items():
+            self.assertEqual(set(formats), {"webp", "jpg"})
+            for name in formats.values():
+                with self._open(name) as image:
+                    self.assertEqual(image.size, (int(size), int(size)))
+                    self.assertEqual(len(image.getexif()), 0)
+        with self._open(profile.profile_picture.name) as original:
+            self.assertEqual(original.size, (600, 400))
+            self.assertEqual(len(original.getexif()), 0)
+        # The raw upload (with its EXIF) is gone
+        self.assertEqual(list(Path(self.media_root).glob("profile_pictures/*")), [])
+
+    def test_identical_uploads_share_files(self):
+        first = self._upload().profile_picture_variants
+        second = self._upload().profile_picture_variants
+        self.assertEqual(first, second)
+
+    def test_stale_job_does_not_overwrite_newer_upload(self):
+        profile = self._upload()
+        with open(Path(self.media_root, profile.profile_picture.name), "rb") as f:
+            data = f.read()
+        renditions = avatars.process_avatar(data)
+        self.assertEqual(avatars.save_renditions(profile.pk, "profile_pictures/old.jpg", renditions), 0)
+
+    def test_renditions_replace_cached_profile(self):
+        token = Token.objects.get(user=self.user)
+        self.client.force_authenticate(user=None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        with override_settings(AVATAR_PROCESSING="process"), mock.patch.object(avatars, "get_pool"):
+            self._upload()  # processing queued, not yet done
+        raw = self.client.get("/api/profiles/me/").data["profile_picture"]
+        self.assertIn("profile_pictures/", raw)
+        with open(Path(self.media_root, self.user.profile.profile_picture.name), "rb") as f:
+            renditions = avatars.process_avatar(f.read())
+        avatars.save_renditions(
+            self.user.profile.pk, self.user.profile.profile_picture.name, renditions
+        )
+        response = self.client.get("/api/profiles/me/")
+        self.assertIn("/avatars/", response.data["profile_picture"])
+        self.assertTrue(response.data["profile_picture_variants"])
+
+    def test_serializer_exposes_variant_urls(self):
+        self._upload()
+        response = self.client.get("/api/profiles/me/")
+        variants = response.data["profile_picture_variants"]
+        self.assertRegex(variants["64"]["webp"], r"^http://testserver/media/avatars/.+\.webp$")
+        self.assertTrue(variants["32"]["jpg"].endswith(".jpg"))
+
+    def test_patch_me_cannot_grant_organizer(self):
+        response = self.client.patch("/api/profiles/me/", {"is_organizer": True, "about_me": "hi"})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data["is_organizer"])
+        self.assertEqual(response.data["about_me"], "hi")
+
+
+@override_settings(DATABASE_LOCK_RETRIES=2, DATABASE_LOCK_RETRY_DELAY=0)
+class LockRetryTests(SimpleTestCase):
+    def _flaky(self, failures, message="database is locked"):
+        calls = []
+
+        @retry_on_lock
+        def write():
+            calls.append(1)
+            if len(calls) <= failures:
+                raise OperationalError(message)
+            return "ok"
+
+        return write, calls
+
+    def test_retries_lock_errors_until_success(self):
+        write, calls = self._flaky(2)
+        self.assertEqual(write(), "ok")
+        self.assertEqual(len(calls), 3)
+
+    def test_gives_up_after_configured_retries(self):
+        write, calls = self._flaky(5)
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        write, calls = self._flaky(1, message="no such table: events_rsvp")
+        with self.assertRaises(OperationalError):
+            write()
+        self.assertEqual(len(calls), 1)
+
+    def test_no_retry_inside_a_transaction(self):
+        write, calls = self._flaky(1)
+        with mock.patch("events.locking.transaction.get_connection") as get_connection:
+            get_connection.return_value.in_atomic_block = True
+            with self.assertRaises(OperationalError):
+                write()
+        self.assertEqual(len(calls), 1)
+
+
+# Replica reads need committed rows: "replica" mirrors "default" over a
+# separate connection.
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(APITransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        routers._down_until.clear()
+        self.addCleanup(routers._down_until.clear)
+        self.user = User.objects.create_user(username="reader", password="pw")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.user.auth_token.key}")
+        start = timezone.now() + timedelta(days=1)
+        self.event = Event.objects.create(
+            created_by=self.user, title="Replicated", start_time=start, end_time=start + timedelta(hours=1)
+        )
+
+    def _aliases_used(self, method, url, client=None, **kwargs):
+        client = client or self.client
+        with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(
+            connections["replica"]
+        ) as replica:
+            response = getattr(client, method)(url, **kwargs)
+        self.assertLess(response.status_code, 400, getattr(response, "data", None))
+        return len(primary.captured_queries), len(replica.captured_queries)
+
+    def test_safe_requests_read_from_replica(self):
+        primary, replica = self._aliases_used("get", "/api/events/?mine=1")
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_writes_use_primary_and_pin_the_writer(self):
+        primary, replica = self._aliases_used(
+            "post", "/api/rsvps/", data={"event": self.event.id, "status": "going"}, format="json"
+        )
+        self.assertEqual(replica, 0)
+        # The writer reads its own write from the primary...
+        primary, replica = self._aliases_used("get", "/api/events/?rsvp=going")
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        # ...while other clients keep using the replica
+        other = self.client_class()
+        primary, replica = self._aliases_used("get", "/api/events/", client=other)
+        self.assertEqual(primary, 0)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        with mock.patch.object(
+            connections["replica"], "ensure_connection", side_effect=OperationalError("down")
+        ), CaptureQueriesContext(connections["default"]) as primary:
+            response = self.client.get("/api/events/")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(len(primary.captured_queries), 0)
+        # Skipped without reconnecting until the retry window passes
+        self.assertFalse(routers.is_healthy("replica"))
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertIsNone(routers.ReplicaRouter().db_for_read(Event))
+
+
+class EventCapacityTests(APITestCase):
+    def setUp(self):
+        self.organizer = User.objects.create_user(username="host", password="pw")
+        start = timezone.now() + timedelta(days=1)
+        self.event = Event.objects.create(
+            created_by=self.organizer,
+            title="Free Pizza",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            capacity=2,
+        )
+        self.users = [User.objects.create_user(username=f"guest{i}", password="pw") for i in range(4)]
+
+    def _rsvp(self, user, status_value):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/rsvps/", {"event": self.event.id, "status": status_value}, format="json"
+            )
+        self.assertIn(response.status_code, (200, 201), response.data)
+        return response.data["status"]
+
+    def _statuses(self):
+        return dict(
+            RSVP.objects.filter(event=self.event).values_list("user__username", "status")
+        )
+
+    def _assert_counts_consistent(self):
+        self.assertEqual(reconcile_rsvp_counts(dry_run=True), [])
+
+    def test_going_beyond_capacity_is_waitlisted(self):
+        results = [self._rsvp(user, RSVP.GOING) for user in self.users[:3]]
+        self.assertEqual(results, [RSVP.GOING, RSVP.GOING, RSVP.WAITLISTED])
+        self.event.refresh_from_db()
+        self.assertEqual((self.event.going_count, self.event.waitlisted_count), (2, 1))
+        self.assertIsNotNone(RSVP.objects.get(user=self.users[2]).waitlisted_at)
+        self._assert_counts_consistent()
+
+    def test_leaving_promotes_longest_waiting(self):
+        for user in self.users:
+            self._rsvp(user, RSVP.GOING)
+        # Asking again keeps guest2 ahead of guest3
+        waitlisted_at = RSVP.objects.get(user=self.users[2]).waitlisted_at
+        self.assertEqual(self._rsvp(self.users[2], RSVP.GOING), RSVP.WAITLISTED)
+        self.assertEqual(RSVP.objects.get(user=self.users[2]).waitlisted_at, waitlisted_at)
+
+        self._rsvp(self.users[0], RSVP.NOT_GOING)
+        statuses = self._statuses()
+        self.assertEqual(statuses["guest2"], RSVP.GOING)
+        self.assertEqual(statuses["guest3"], RSVP.WAITLISTED)
+        self.assertTrue(
+            Notification.objects.filter(user=self.users[2], event=self.event).exists()
+        )
+        self._assert_counts_consistent()
+
+    def test_promotion_respects_notification_opt_out(self):
+        for user in self.users[:3]:
+            self._rsvp(user, RSVP.GOING)
+        self.users[2].profile.notifications_opt_out = True
+        self.users[2].profile.save()
+        with mock.patch("events.push.publish") as publish:
+            self._rsvp(self.users[0], RSVP.NOT_GOING)
+        self.assertEqual(self._statuses()["guest2"], RSVP.GOING)
+        self.assertFalse(Notification.objects.filter(user=self.users[2]).exists())
+        publish.assert_not_called()
+
+    def test_deleting_a_seat_and_raising_capacity_promote(self):
+        for user in self.users:
+            self._rsvp(user, RSVP.GOING)
+        self.client.force_authenticate(user=self.users[1])
+        with self.captureOnCommitCallbacks(execute=True):
+            rsvp_id = RSVP.objects.get(user=self.users[1]).id
+            self.assertEqual(self.client.delete(f"/api/rsvps/{rsvp_id}/").status_code, 204)
+        self.assertEqual(self._statuses()["guest2"], RSVP.GOING)
+
+        self.event.capacity = None
+        self.event.save()
+        self.assertEqual(self._statuses()["guest3"], RSVP.GOING)
+        self._assert_counts_consistent()
+
+    def test_claim_is_conditional_on_the_counter(self):
+        Event.objects.filter(pk=self.event.pk).update(going_count=2)
+        self.assertFalse(seats.claim_seat(self.event.pk))
+        Event.objects.filter(pk=self.event.pk).update(capacity=3)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(seats.claim_seat(self.event.pk))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertFalse(seats.claim_seat(self.event.pk))
+
+    def test_rsvp_cannot_move_to_another_event(self):
+        other = Event.objects.create(
+            created_by=self.organizer,
+            title="Other",
+            start_time=self.event.start_time,
+            end_time=self.event.end_time,
+        )
+        self.client.force_authenticate(user=self.users[0])
+        rsvp = RSVP.objects.create(user=self.users[0], event=other, status=RSVP.GOING)
+        response = self.client.patch(
+            f"/api/rsvps/{rsvp.id}/", {"event": self.event.id, "status": RSVP.GOING}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("event", response.data)
+        rsvp.refresh_from_db()
+        self.assertEqual(rsvp.event_id, other.id)
+        # A same-event PATCH still goes through allocation
+        self._rsvp(self.users[1], RSVP.GOING)
+        own = RSVP.objects.create(user=self.users[2], event=self.event, status=RSVP.MAYBE)
+        self._rsvp(self.users[3], RSVP.GOING)
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.patch(
+            f"/api/rsvps/{own.id}/", {"event": self.event.id, "status": RSVP.GOING}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["status"], RSVP.WAITLISTED)
+        self._assert_counts_consistent()
+
+    def test_waitlisted_cannot_be_requested(self):
+        self.client.force_authenticate(user=self.users[0])
+        response = self.client.post(
+            "/api/rsvps/", {"event": self.event.id, "status": RSVP.WAITLISTED}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_allocates_limited_events_per_item(self):
+        self._rsvp(self.users[0], RSVP.GOING)
+        self._rsvp(self.users[1], RSVP.GOING)
+        open_event = Event.objects.create(
+            created_by=self.organizer,
+            title="Open Mic",
+            start_time=self.event.start_time,
+            end_time=self.event.end_time,
+        )
+        self.client.force_authenticate(user=self.users[2])
+        response = self.client.post(
+            "/api/rsvps/bulk/",
+            {
+                "rsvps": [
+                    {"event": self.event.id, "status": RSVP.GOING},
+                    {"event": open_event.id, "status": RSVP.GOING},
+                ]
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        results = response.data["results"]
+        self.assertEqual(results[0]["status"], RSVP.WAITLISTED)
+        self.assertEqual(results[0]["result"], "created")
+        self.assertEqual(results[1]["status"], RSVP.GOING)
+        self._assert_counts_consistent()
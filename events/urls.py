@@ -9,6 +9,8 @@ from .views import (
     SignupViewSet,
     LoginView,
     LogoutView,
+    calendar_feed,
+    notification_stream,
     PasswordResetRequestView,
     PasswordResetConfirmView,
 )
@@ -48,6 +50,7 @@ urlpatterns = [
     path("about/", about_page, name="web-about"),
     path("contact/", contact_page, name="web-contact"),
     path("calendar/", calendar_page, name="web-calendar"),
+    path("calendar/feed/<str:token>.ics", calendar_feed, name="calendar-feed"),
     path("profile/", profile_page, name="web-profile"),
     path("profile/settings/", prof_settings_page, name="web-profile-settings"),
     path("profile/friends/", prof_friends_page, name="web-profile-friends"),
@@ -56,6 +59,8 @@ urlpatterns = [
     path("profile/messages/", prof_messages_page, name="web-profile-messages"),
     path("profile/my-events/", my_events_page, name="web-my-events"),
     path("manage/<int:event_id>/", manage_event_page, name="web-manage-event"),
+    # Before the router, whose notification detail route would match "stream"
+    path("api/notifications/stream/", notification_stream, name="notification-stream"),
     path("api/", include(router.urls)),
     path("api/auth/login/", LoginView.as_view(), name="api-login"),
     path("api/auth/logout/", LogoutView.as_view(), name="api-logout"),
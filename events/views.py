@@ -1,31 +1,68 @@
-from math import radians, cos, sin, asin, sqrt
+from datetime import datetime, time
+
+from asgiref.sync import sync_to_async
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models import Count, Q
+from django.db.models import OuterRef, Subquery
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from django.views.decorators.http import require_GET
 from rest_framework import generics, mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    NotAuthenticated,
+    PermissionDenied,
+    ValidationError,
+)
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.parsers import JSONParser
-
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+
+from . import notifications, push
+from .authentication import CookieTokenAuthentication, token_cache
+from .caching import (
+    LISTING_SCOPE,
+    event_validators,
+    get_or_compute,
+    get_version,
+    listing_cache_key,
+    listing_validators,
+    not_modified_response,
+    set_validators,
+)
+from .counters import COUNTER_FIELDS
+from .exporters import FORMATS as EXPORT_FORMATS, attendee_rows, stream_csv, stream_ndjson
+from .geo import bounding_box_filter, distance_km_expression
+from .ics import ensure_calendar_token, feed_validator, get_feed, user_id_for_token
+from .importers import EventImporter, ImportFileError, ImportInterrupted, guess_format
 from .models import Event, RSVP, Announcement, Notification, Profile
 from .serializers import (
     EmptySerializer,
     EventSerializer,
+    EventImportRequestSerializer,
     RSVPSerializer,
+    RSVPBulkSerializer,
     AnnouncementSerializer,
     NotificationSerializer,
     UserSerializer,
     SignupSerializer,
     ProfileSerializer,
     ProfileUpdateSerializer,
+    ProfileSelfUpdateSerializer,
     OrganizerStatusSerializer,
     PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer,
 )
+from .pagination import EventCursorPagination
+from .search import get_search_backend
 from .permissions import (
     IsOrganizerOrReadOnly,
     IsOwnerOrganizerOrReadOnly,
@@ -76,8 +113,10 @@ class LogoutView(generics.GenericAPIView):
     def post(self, request):
         token = getattr(request, "auth", None)
         if isinstance(token, Token):
+            token_cache.invalidate(token.key)
             token.delete()
         elif token:
+            token_cache.invalidate(str(token))
             Token.objects.filter(key=str(token)).delete()
 
         response = Response({"detail": "Logged out."}, status=status.HTTP_200_OK)
@@ -104,12 +143,18 @@ class ProfileViewSet(
             return OrganizerStatusSerializer
         return ProfileSerializer
 
-    @action(detail=False, methods=["get"])
+    @action(detail=False, methods=["get", "patch"], permission_classes=[IsAuthenticated])
     def me(self, request):
-        return Response(ProfileSerializer(request.user.profile).data)
+        """The caller's profile; PATCH updates it (a new picture is resized in the background)."""
+        profile = request.user.profile
+        if request.method == "PATCH":
+            serializer = ProfileSelfUpdateSerializer(profile, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(ProfileSerializer(profile, context=self.get_serializer_context()).data)
 
     @action(detail=True, methods=["post"], url_path="organizer")
-    def organizer(self, request, pk=None):
+    def organizer(self, request, user_id=None):
         profile = self.get_object()
         serializer = self.get_serializer(data=request.data or {"is_organizer": True})
         serializer.is_valid(raise_exception=True)
@@ -117,23 +162,58 @@ class ProfileViewSet(
         profile.save(update_fields=["is_organizer"])
         return Response(ProfileSerializer(profile).data)
 
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        url_path="me/calendar-feed",
+        permission_classes=[IsAuthenticated],
+    )
+    def calendar_feed(self, request):
+        """GET the personal .ics feed link (null until created); POST creates or rotates it.
+
+        Only POST writes, so replica routing pins the client to the primary
+        before it fetches the new link.
+        """
+        if request.method == "POST":
+            token = ensure_calendar_token(request.user.profile, rotate=True)
+        else:
+            token = request.user.profile.calendar_token
+        if not token:
+            return Response({"url": None})
+        url = request.build_absolute_uri(reverse("calendar-feed", args=[token]))
+        return Response({"url": url})
+
 
 # ---------- Events ----------
-def haversine_km(lat1, lon1, lat2, lon2):
-    # great-circle distance between two points
-    R = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = (
-        sin(dlat / 2) ** 2
-        + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    )
-    return 2 * R * asin(sqrt(a))
+# Seconds a browser may reuse a calendar range before revalidating
+CALENDAR_MAX_AGE = 60
+TRUTHY = {"1", "true", "True"}
+# ``rsvp`` filter values; listings filtered by who is asking are never shared
+RSVP_FILTER_STATUSES = {RSVP.GOING, RSVP.MAYBE, RSVP.NOT_GOING}
+
+
+def parse_range_bound(value):
+    """Parse a FullCalendar start/end value (datetime or bare date)."""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            parsed = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
 
 
 class EventViewSet(viewsets.ModelViewSet):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    pagination_class = EventCursorPagination
     # Write operations require organizer; object writes require owner or staff
     permission_classes = [IsOrganizerOrReadOnly & IsOwnerOrganizerOrReadOnly]
 
@@ -141,8 +221,179 @@ class EventViewSet(viewsets.ModelViewSet):
         """Set the created_by field to the current user when creating an event."""
         serializer.save(created_by=self.request.user)
 
+    # Set while building a listing for the shared cache (no per-user fields)
+    shared_listing = False
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["shared_listing"] = self.shared_listing
+        return context
+
+    def get_serializer_class(self):
+        if self.action == "import_events":
+            return EventImportRequestSerializer
+        return EventSerializer
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        parser_classes=[MultiPartParser, FormParser],
+    )
+    def import_events(self, request):
+        """Bulk-create events from an uploaded CSV or NDJSON file."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = serializer.validated_data.get("file_format") or guess_format(
+            upload.name
+        )
+        importer = EventImporter(
+            request.user, dry_run=serializer.validated_data["dry_run"]
+        )
+        try:
+            report = importer.run(upload.open("rb"), file_format)
+        except ImportFileError as exc:
+            raise ValidationError({"file": [str(exc)]})
+        except ImportInterrupted as exc:
+            return Response(
+                {"detail": str(exc), **exc.report},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        code = status.HTTP_200_OK if report["dry_run"] else status.HTTP_201_CREATED
+        return Response(report, status=code)
+
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        """Slim, unpaginated feed for FullCalendar; needs a start/end range."""
+        missing = [
+            p for p in ("start", "end") if parse_range_bound(request.query_params.get(p)) is None
+        ]
+        if missing:
+            raise ValidationError({p: "A valid date or datetime is required." for p in missing})
+        # Titles and times only: no counters, so no per-event RSVP versions
+        etag, last_modified = event_validators(request)
+        not_modified = not_modified_response(
+            request, etag, last_modified, max_age=CALENDAR_MAX_AGE
+        )
+        if not_modified is not None:
+            return not_modified
+        queryset = self.filter_queryset(self.get_queryset())
+        events = queryset.order_by("start_time", "id").values(
+            "id", "title", "start_time", "end_time"
+        )
+        response = Response(
+            [
+                {"id": e["id"], "title": e["title"], "start": e["start_time"], "end": e["end_time"]}
+                for e in events
+            ]
+        )
+        return set_validators(response, etag, last_modified, max_age=CALENDAR_MAX_AGE)
+
+    @action(detail=True, methods=["get"], url_path="attendees")
+    def export_attendees(self, request, pk=None):
+        """Stream the event's RSVPs as CSV (default) or NDJSON; organizer only."""
+        event = self.get_object()
+        user = request.user
+        if not user.is_authenticated:
+            raise NotAuthenticated()
+        if event.created_by_id != user.id and not user.is_staff:
+            raise PermissionDenied("Only the event organizer can export attendees.")
+
+        file_format = request.query_params.get("file_format", "csv")
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({"file_format": f"Choose one of {', '.join(EXPORT_FORMATS)}."})
+        rsvp_status = request.query_params.get("status")
+        rows = attendee_rows(event, status=rsvp_status)
+        if file_format == "csv":
+            response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv")
+        else:
+            response = StreamingHttpResponse(
+                stream_ndjson(rows), content_type="application/x-ndjson"
+            )
+        response["Content-Disposition"] = (
+            f'attachment; filename="event-{event.pk}-attendees.{file_format}"'
+        )
+        return response
+
+    def list(self, request, *args, **kwargs):
+        if self.filters_by_user():
+            return self.list_for_user(request, *args, **kwargs)
+        return self.list_shared(request, *args, **kwargs)
+
+    def filters_by_user(self):
+        """Whether ``get_queryset`` narrows the listing to the requesting user."""
+        user = getattr(self.request, "user", None)
+        if not (user and getattr(user, "is_authenticated", False)):
+            return False
+        params = self.request.query_params
+        return params.get("mine") in TRUTHY or params.get("rsvp") in RSVP_FILTER_STATUSES
+
+    def list_shared(self, request, *args, **kwargs):
+        """Serve a listing from the shared cache, then overlay counters and ``my_rsvp``.
+
+        The cached page only changes when events do; RSVP counters and the
+        user's own RSVP are read fresh for the page's events in one query.
+        """
+        key = listing_cache_key(request)
+
+        def build():
+            self.shared_listing = True
+            try:
+                return dict(super(EventViewSet, self).list(request, *args, **kwargs).data)
+            finally:
+                self.shared_listing = False
+
+        version, data = get_or_compute(key, get_version(LISTING_SCOPE), build)
+        results = data["results"]
+        ids = [item["id"] for item in results]
+        etag, last_modified = listing_validators(request, key, version, ids)
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if ids:
+            rows = Event.objects.filter(pk__in=ids).values("pk", *COUNTER_FIELDS.values())
+            user = request.user
+            if user and user.is_authenticated:
+                rows = rows.annotate(
+                    my_rsvp=Subquery(
+                        RSVP.objects.filter(event=OuterRef("pk"), user=user).values("status")[:1]
+                    )
+                )
+            fresh = {row.pop("pk"): row for row in rows}
+            data = {
+                **data,
+                "results": [{**item, **fresh.get(item["id"], {})} for item in results],
+            }
+        return set_validators(Response(data), etag, last_modified)
+
+    def list_for_user(self, request, *args, **kwargs):
+        # Conditional GET from the page's rows and cached versions only; a 304
+        # skips serializing
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        etag, last_modified = event_validators(request, [event.pk for event in page])
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            event_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)  # 404 as usual
+        etag, last_modified = event_validators(request, [event_id])
+        not_modified = not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
     def get_queryset(self):
-        qs = Event.objects.all()
+        qs = Event.objects.select_related("created_by")
         # search / filters (US-4)
         q = self.request.query_params.get("q")
         date_from = self.request.query_params.get("date_from")
@@ -154,22 +405,25 @@ class EventViewSet(viewsets.ModelViewSet):
         created_by = self.request.query_params.get("created_by")
 
         if q:
-            qs = qs.filter(
-                Q(title__icontains=q)
-                | Q(description__icontains=q)
-                | Q(perks__icontains=q)
-                | Q(location_name__icontains=q)
-                | Q(address__icontains=q)
-            )
+            prefix = self.request.query_params.get("prefix") in {"1", "true", "True"}
+            qs = get_search_backend().search(qs, q, prefix=prefix)
 
         if date_from:
             qs = qs.filter(start_time__gte=date_from)
         if date_to:
             qs = qs.filter(start_time__lte=date_to)
 
+        # FullCalendar range: events overlapping [start, end)
+        range_start = parse_range_bound(self.request.query_params.get("start"))
+        range_end = parse_range_bound(self.request.query_params.get("end"))
+        if range_end is not None:
+            qs = qs.filter(start_time__lt=range_end)
+        if range_start is not None:
+            qs = qs.filter(end_time__gt=range_start)
+
         # filter by creator
         user = getattr(self.request, "user", None)
-        if mine in {"1", "true", "True"} and user and getattr(user, "is_authenticated", False):
+        if mine in TRUTHY and user and getattr(user, "is_authenticated", False):
             qs = qs.filter(created_by=user)
         if created_by:
             try:
@@ -179,38 +433,29 @@ class EventViewSet(viewsets.ModelViewSet):
 
         # filter by current user's RSVP status (e.g., rsvp=going|maybe|not_going)
         rsvp_status = self.request.query_params.get("rsvp")
-        if rsvp_status in {RSVP.GOING, RSVP.MAYBE, RSVP.NOT_GOING} and user and getattr(user, "is_authenticated", False):
+        if rsvp_status in RSVP_FILTER_STATUSES and user and getattr(user, "is_authenticated", False):
             qs = qs.filter(rsvps__user=user, rsvps__status=rsvp_status)
 
-        # annotate RSVP counts
-        qs = qs.annotate(
-            going_count=Count("rsvps", filter=Q(rsvps__status=RSVP.GOING)),
-            maybe_count=Count("rsvps", filter=Q(rsvps__status=RSVP.MAYBE)),
-            not_going_count=Count("rsvps", filter=Q(rsvps__status=RSVP.NOT_GOING)),
-        )
+        # resolve the current user's RSVP in the same query (avoids an N+1 in get_my_rsvp)
+        if user and getattr(user, "is_authenticated", False) and not self.shared_listing:
+            qs = qs.annotate(
+                my_rsvp_status=Subquery(
+                    RSVP.objects.filter(event=OuterRef("pk"), user=user).values("status")[:1]
+                )
+            )
 
-        # simple proximity sort if lat/lon provided
+        # proximity search: indexed bounding-box prefilter, exact distance in SQL
         if near_lat and near_lon:
-            lat0, lon0 = float(near_lat), float(near_lon)
-            events = list(qs)
-
-            def dist(e):
-                if e.latitude is None or e.longitude is None:
-                    return float("inf")
-                return haversine_km(lat0, lon0, e.latitude, e.longitude)
-
-            events.sort(key=dist)
-            if radius_km is not None:
-                events = [
-                    e
-                    for e in events
-                    if (
-                        e.latitude is not None
-                        and e.longitude is not None
-                        and dist(e) <= radius_km
-                    )
-                ]
-            return events
+            try:
+                lat0, lon0 = float(near_lat), float(near_lon)
+            except ValueError:
+                return qs
+            qs = (
+                qs.filter(**bounding_box_filter(lat0, lon0, radius_km))
+                .annotate(distance_km=distance_km_expression(lat0, lon0))
+                .filter(distance_km__lte=radius_km)
+                .order_by("distance_km", "id")
+            )
         return qs
 
 
@@ -220,9 +465,21 @@ class RSVPViewSet(viewsets.ModelViewSet):
     serializer_class = RSVPSerializer
     permission_classes = [IsAuthenticated & IsRSVPOwnerOrReadOnly]
 
+    def get_serializer_class(self):
+        if self.action == "bulk":
+            return RSVPBulkSerializer
+        return RSVPSerializer
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """Upsert many RSVPs for the current user; reports a result per item."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": serializer.save()})
+
     def get_queryset(self):
         qs = super().get_queryset()
         event_id = self.request.query_params.get("event")
@@ -247,16 +504,81 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
         request = getattr(self, "request", None)
         user = getattr(request, "user", None)
         if user and getattr(user, "is_authenticated", False):
-            return Notification.objects.filter(user=user).order_by("-created_at")
+            qs = Notification.objects.filter(user=user)
+            if request.query_params.get("unread") in {"1", "true", "True"}:
+                qs = qs.filter(read=False)
+            return qs.order_by("-created_at")
         return Notification.objects.none()
 
-    @action(detail=True, methods=["post"])
+    # Writes only touch the caller's own notifications (see get_queryset).
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
     def mark_read(self, request, pk=None):
-        notif = self.get_object()
-        notif.read = True
-        notif.save()
+        notifications.mark_read(self.get_object())
         return Response({"status": "ok"})
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def mark_all_read(self, request):
+        updated = notifications.mark_all_read(request.user.pk)
+        return Response({"status": "ok", "updated": updated})
+
+    @action(detail=False, methods=["get"])
+    def unread_count(self, request):
+        return Response({"unread": notifications.unread_count(request.user.pk)})
+
+
+def stream_user(request):
+    try:
+        result = CookieTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
+
+
+async def notification_stream(request):
+    """Server-sent events carrying the user's new notifications as they are delivered.
+
+    Each open stream is an idle coroutine, so it needs the ASGI server; under
+    WSGI it would pin a worker thread per client.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse("Notification streaming requires the ASGI server.", status=501)
+    user = await sync_to_async(stream_user)(request)
+    if user is None:
+        return HttpResponse(status=401)
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_event_id = None
+    response = StreamingHttpResponse(
+        push.sse_stream(user.pk, last_event_id), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let a proxy buffer the stream
+    return response
+
+
+# ---------- iCalendar feed ----------
+@require_GET
+def calendar_feed(request, token):
+    """A user's "going" events as iCalendar, for subscribing from calendar apps.
+
+    The token in the URL is the only credential, since calendar apps cannot
+    log in. Polls with a matching If-None-Match cost one aggregate query.
+    """
+    user_id = user_id_for_token(token)
+    if user_id is None:
+        raise Http404
+    etag = feed_validator(user_id)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            get_feed(user_id, etag), content_type="text/calendar; charset=utf-8"
+        )
+        response["Content-Disposition"] = 'inline; filename="campusbites.ics"'
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 
 # ---------- Password reset ----------
 class PasswordResetRequestView(generics.GenericAPIView):
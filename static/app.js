@@ -156,6 +156,18 @@
         return date.toLocaleDateString(undefined, { dateStyle: 'medium' });
     }
 
+    // Smallest processed avatar at least `size` px, falling back to the upload
+    function avatarSource(profile, size) {
+        const variants = profile.profile_picture_variants || {};
+        const sizes = Object.keys(variants).map(Number).sort((a, b) => a - b);
+        const fit = sizes.find(s => s >= size) || sizes[sizes.length - 1];
+        if (fit) {
+            const formats = variants[String(fit)];
+            return formats.webp || formats.jpg;
+        }
+        return profile.profile_picture;
+    }
+
     const UPCOMING_DISMISS_KEY = "upcoming-event-banner";
     const UPCOMING_WINDOW_HOURS = 24;
 
@@ -220,7 +232,8 @@
         }
 
         try {
-            const response = await apiFetch(`${EVENTS_ENDPOINT}?rsvp=going`);
+            const dateFrom = encodeURIComponent(new Date().toISOString());
+            const response = await apiFetch(`${EVENTS_ENDPOINT}?rsvp=going&date_from=${dateFrom}`);
             if (!response.ok) {
                 return;
             }
@@ -462,10 +475,13 @@
                                const data = await resp.json().catch(() => ({}));
                                showAlert('[data-events-alerts]', flattenErrors(data) || 'Unable to save RSVP.', 'danger');
                            } else {
+                               const saved = await resp.json().catch(() => ({}));
                                // Close modal and refresh list
                                $('#eventDetailsModal').modal('hide');
                                await loadEventsList();
-                               if (btn.dataset.rsvp === 'going') {
+                               if (saved.status === 'waitlisted') {
+                                   showAlert('[data-events-alerts]', "This event is full. You're on the waitlist and will be notified if a seat opens up.", 'info');
+                               } else if (btn.dataset.rsvp === 'going') {
                                    showAlert('[data-events-alerts]', 'Great! This event has been added to your calendar.', 'success');
                                }
                            }
@@ -506,116 +522,161 @@
         }
         const alerts = document.querySelector("[data-events-alerts]");
 
-        try {
-            const response = await apiFetch(EVENTS_ENDPOINT);
-            if (!response.ok) {
-                throw new Error(`Failed to fetch events: ${response.status}`);
-            }
-            const payload = await response.json();
-            const events = Array.isArray(payload) ? payload : payload.results || [];
-            listContainer.innerHTML = "";
+        await loadEventsPage(EVENTS_ENDPOINT, false);
 
-            if (!events.length) {
-                const empty = document.createElement("p");
-                empty.className = "text-muted";
-                empty.textContent = "No events are available yet.";
-                listContainer.appendChild(empty);
-                return;
-            }
+        async function loadEventsPage(url, append) {
+            try {
+                const response = await apiFetch(url);
+                if (!response.ok) {
+                    throw new Error(`Failed to fetch events: ${response.status}`);
+                }
+                const payload = await response.json();
+                const events = Array.isArray(payload) ? payload : payload.results || [];
+                const nextUrl = Array.isArray(payload) ? null : payload.next;
+                if (!append) {
+                    listContainer.innerHTML = "";
+                }
+                const previousMore = listContainer.querySelector("[data-events-more]");
+                if (previousMore) {
+                    previousMore.remove();
+                }
 
-            events.forEach((event) => {
-                const card = document.createElement("div");
-                card.className = "card mb-3 shadow-sm";
+                if (!events.length && !append) {
+                    const empty = document.createElement("p");
+                    empty.className = "text-muted";
+                    empty.textContent = "No events are available yet.";
+                    listContainer.appendChild(empty);
+                    return;
+                }
 
-                // Card Header
-                const cardHeader = document.createElement("div");
-                cardHeader.className = "card-header d-flex justify-content-between align-items-center";
+                events.forEach((event) => {
+                    const card = document.createElement("div");
+                    card.className = "card mb-3 shadow-sm";
+
+                    // Card Header
+                    const cardHeader = document.createElement("div");
+                    cardHeader.className = "card-header d-flex justify-content-between align-items-center";
                 
-                const title = document.createElement("h5");
-                title.className = "mb-0";
-                   title.style.cursor = "pointer";
-                   title.style.color = "inherit";
-                title.textContent = event.title;
+                    const title = document.createElement("h5");
+                    title.className = "mb-0";
+                       title.style.cursor = "pointer";
+                       title.style.color = "inherit";
+                    title.textContent = event.title;
                
-                   // Add click handler to show modal
-                   title.addEventListener('click', () => showEventDetailsModal(event));
+                       // Add click handler to show modal
+                       title.addEventListener('click', () => showEventDetailsModal(event));
                 
-                cardHeader.appendChild(title);
-
-                // Make entire header clickable as well
-                cardHeader.style.cursor = 'pointer';
-                cardHeader.addEventListener('click', (e) => {
-                    // Avoid double-trigger if child already handled
-                    if (e.target === cardHeader) {
-                        showEventDetailsModal(event);
-                    }
-                });
+                    cardHeader.appendChild(title);
+
+                    // Make entire header clickable as well
+                    cardHeader.style.cursor = 'pointer';
+                    cardHeader.addEventListener('click', (e) => {
+                        // Avoid double-trigger if child already handled
+                        if (e.target === cardHeader) {
+                            showEventDetailsModal(event);
+                        }
+                    });
 
-                // Card Body
-                const cardBody = document.createElement("div");
-                cardBody.className = "card-body";
-                // Only show the date/time in the card body; details are in the modal
-                const timing = document.createElement("p");
-                timing.className = "card-subtitle mb-1 text-muted";
+                    // Card Body
+                    const cardBody = document.createElement("div");
+                    cardBody.className = "card-body";
+                    // Only show the date/time in the card body; details are in the modal
+                    const timing = document.createElement("p");
+                    timing.className = "card-subtitle mb-1 text-muted";
                 
-                // Check if event is on a single day
-                const startDate = new Date(event.start_time);
-                const endDate = event.end_time ? new Date(event.end_time) : null;
-                const isSameDay = endDate && 
-                    startDate.getFullYear() === endDate.getFullYear() &&
-                    startDate.getMonth() === endDate.getMonth() &&
-                    startDate.getDate() === endDate.getDate();
+                    // Check if event is on a single day
+                    const startDate = new Date(event.start_time);
+                    const endDate = event.end_time ? new Date(event.end_time) : null;
+                    const isSameDay = endDate && 
+                        startDate.getFullYear() === endDate.getFullYear() &&
+                        startDate.getMonth() === endDate.getMonth() &&
+                        startDate.getDate() === endDate.getDate();
                 
-                if (isSameDay) {
-                    // Single day: show date on one line, time range below
-                    const dateStr = formatDateOnly(event.start_time);
-                    const startTime = startDate.toLocaleTimeString(undefined, { timeStyle: 'short' });
-                    const endTime = endDate.toLocaleTimeString(undefined, { timeStyle: 'short' });
-                    timing.innerHTML = `${dateStr}<br><small>${startTime} – ${endTime}</small>`;
-                } else {
-                    // Multi-day or no end: show date range as before
-                    const startDateStr = formatDateOnly(event.start_time);
-                    const endDateStr = formatDateOnly(event.end_time);
-                    const showRange = endDateStr && endDateStr !== startDateStr;
-                    timing.textContent = showRange ? `${startDateStr} – ${endDateStr}` : startDateStr;
-                }
+                    if (isSameDay) {
+                        // Single day: show date on one line, time range below
+                        const dateStr = formatDateOnly(event.start_time);
+                        const startTime = startDate.toLocaleTimeString(undefined, { timeStyle: 'short' });
+                        const endTime = endDate.toLocaleTimeString(undefined, { timeStyle: 'short' });
+                        timing.innerHTML = `${dateStr}<br><small>${startTime} – ${endTime}</small>`;
+                    } else {
+                        // Multi-day or no end: show date range as before
+                        const startDateStr = formatDateOnly(event.start_time);
+                        const endDateStr = formatDateOnly(event.end_time);
+                        const showRange = endDateStr && endDateStr !== startDateStr;
+                        timing.textContent = showRange ? `${startDateStr} – ${endDateStr}` : startDateStr;
+                    }
                 
-                cardBody.appendChild(timing);
-
-                // Organizer line
-                if (event.created_by && event.created_by.username) {
-                    const org = document.createElement('p');
-                    org.className = 'mb-1 small';
-                    const a = document.createElement('a');
-                    a.href = `/profile/?user=${event.created_by.id}`;
-                    a.textContent = event.created_by.username;
-                    a.className = 'organizer-link';
-                    a.addEventListener('click', (e) => { e.stopPropagation(); });
-                    org.innerHTML = '<strong>Organizer:</strong> ';
-                    org.appendChild(a);
-                    cardBody.appendChild(org);
-                }
+                    cardBody.appendChild(timing);
+
+                    // Organizer line
+                    if (event.created_by && event.created_by.username) {
+                        const org = document.createElement('p');
+                        org.className = 'mb-1 small';
+                        const a = document.createElement('a');
+                        a.href = `/profile/?user=${event.created_by.id}`;
+                        a.textContent = event.created_by.username;
+                        a.className = 'organizer-link';
+                        a.addEventListener('click', (e) => { e.stopPropagation(); });
+                        org.innerHTML = '<strong>Organizer:</strong> ';
+                        org.appendChild(a);
+                        cardBody.appendChild(org);
+                    }
 
-                // View details hint under date
-                const detailsRow = document.createElement('div');
-                detailsRow.className = 'small details-hint mt-1';
-                detailsRow.textContent = 'View details ›';
-                detailsRow.style.cursor = 'pointer';
-                detailsRow.addEventListener('click', () => showEventDetailsModal(event));
-                cardBody.appendChild(detailsRow);
-
-                // Make the whole card body open the modal for convenience
-                cardBody.style.cursor = "pointer";
-                cardBody.addEventListener('click', () => showEventDetailsModal(event));
+                    // View details hint under date
+                    const detailsRow = document.createElement('div');
+                    detailsRow.className = 'small details-hint mt-1';
+                    detailsRow.textContent = 'View details ›';
+                    detailsRow.style.cursor = 'pointer';
+                    detailsRow.addEventListener('click', () => showEventDetailsModal(event));
+                    cardBody.appendChild(detailsRow);
+
+                    // Make the whole card body open the modal for convenience
+                    cardBody.style.cursor = "pointer";
+                    cardBody.addEventListener('click', () => showEventDetailsModal(event));
                 
-                card.appendChild(cardHeader);
-                card.appendChild(cardBody);
-                listContainer.appendChild(card);
-            });
-        } catch (error) {
-            console.error(error);
-            showAlert(alerts, "Unable to load events right now. Please try again later.", "danger");
+                    card.appendChild(cardHeader);
+                    card.appendChild(cardBody);
+                    listContainer.appendChild(card);
+                });
+
+                // Keyset pagination: fetch the next page on demand
+                if (nextUrl) {
+                    const more = document.createElement("button");
+                    more.type = "button";
+                    more.className = "btn btn-outline-secondary btn-block";
+                    more.textContent = "Load more events";
+                    more.setAttribute("data-events-more", "");
+                    more.addEventListener("click", () => {
+                        more.disabled = true;
+                        more.textContent = "Loading…";
+                        loadEventsPage(nextUrl, true);
+                    });
+                    listContainer.appendChild(more);
+                }
+            } catch (error) {
+                console.error(error);
+                showAlert(alerts, "Unable to load events right now. Please try again later.", "danger");
+            }
+        }
+    }
+
+    // Follow `next` links of a paginated list endpoint and collect every result
+    async function fetchAllPages(url) {
+        const results = [];
+        let nextUrl = url;
+        while (nextUrl) {
+            const resp = await apiFetch(nextUrl);
+            if (!resp.ok) {
+                throw new Error(`Failed to fetch ${nextUrl}: ${resp.status}`);
+            }
+            const payload = await resp.json();
+            if (Array.isArray(payload)) {
+                return results.concat(payload);
+            }
+            results.push(...(payload.results || []));
+            nextUrl = payload.next;
         }
+        return results;
     }
 
     // ---- My Events (profile_my_events.html) ----
@@ -627,10 +688,7 @@
         async function refresh() {
             listContainer.innerHTML = '<p class="text-muted mb-0">Loading your events…</p>';
             try {
-                const resp = await apiFetch(`${EVENTS_ENDPOINT}?mine=1`);
-                if (!resp.ok) throw new Error('Failed to fetch my events');
-                const payload = await resp.json();
-                const events = Array.isArray(payload) ? payload : (payload.results || []);
+                const events = await fetchAllPages(`${EVENTS_ENDPOINT}?mine=1`);
                 listContainer.innerHTML = '';
                 if (!events.length) {
                     listContainer.innerHTML = '<p class="text-muted mb-0">You haven\'t created any events yet.</p>';
@@ -1140,8 +1198,9 @@
         }
 
         const profilePicture = document.querySelector("[data-profile-picture]");
-        if (profilePicture && profile.profile_picture) {
-            profilePicture.src = profile.profile_picture;
+        const avatarUrl = avatarSource(profile, 64);
+        if (profilePicture && avatarUrl) {
+            profilePicture.src = avatarUrl;
         }
 
         // Handle About Me save button in settings
@@ -1187,9 +1246,10 @@
                     if (response.ok) {
                         const updatedProfile = await response.json();
                         const allProfilePictures = document.querySelectorAll("[data-profile-picture]");
-                        if (updatedProfile.profile_picture) {
+                        const updatedUrl = avatarSource(updatedProfile, 64);
+                        if (updatedUrl) {
                             allProfilePictures.forEach(img => {
-                                img.src = updatedProfile.profile_picture;
+                                img.src = updatedUrl;
                             });
                         }
                         showAlert(alerts, "Profile picture updated successfully!", "success");
@@ -1677,6 +1737,38 @@
         });
     }
 
+    // ---- Live notifications (server-sent events) ----
+    // Re-dispatched as "campusbites:notification" so any page can react. The
+    // browser reconnects on its own, resuming from the last event id. Pages
+    // only opt in when the server can stream (ASGI with a push broker).
+    function subscribeToNotifications(authState) {
+        if (
+            !authState.authenticated ||
+            !window.EventSource ||
+            document.body.dataset.notificationStream !== "true"
+        ) {
+            return;
+        }
+        const source = new EventSource("/api/notifications/stream/", { withCredentials: true });
+        source.addEventListener("error", () => {
+            // An error status (e.g. 501 under WSGI) closes the source for good;
+            // only network drops leave it reconnecting.
+            if (source.readyState === EventSource.CLOSED) {
+                source.close();
+            }
+        });
+        source.addEventListener("notification", (message) => {
+            let detail;
+            try {
+                detail = JSON.parse(message.data);
+            } catch (error) {
+                console.error("Invalid notification payload", error);
+                return;
+            }
+            document.dispatchEvent(new CustomEvent("campusbites:notification", { detail }));
+        });
+    }
+
     document.addEventListener("DOMContentLoaded", async () => {
         // Apply theme immediately on page load for all pages
         applyTheme();
@@ -1705,5 +1797,6 @@
         initThemeToggle();
         loadEventManagement();
         maybeShowUpcomingEvent(authState);
+        subscribeToNotifications(authState);
     });
 })();